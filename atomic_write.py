@@ -0,0 +1,34 @@
+import contextlib
+import os
+import shutil
+import tempfile
+
+
+@contextlib.contextmanager
+def temp_path(path, directory=False):
+    """
+    Yields a fresh temp file (or folder, with directory=True) next to `path`. When the block
+    succeeds it replaces `path`, so readers never see a partial write; otherwise it is removed.
+
+    The name comes from mkstemp / mkdtemp, so it is unique per call: threads or processes
+    writing the same target never share a temp file.
+    """
+    folder = os.path.dirname(path) or "."
+    os.makedirs(folder, exist_ok=True)
+    prefix = f".{os.path.basename(path)}."
+    if directory:
+        tmp_path = tempfile.mkdtemp(dir=folder, prefix=prefix, suffix=".tmp")
+    else:
+        fd, tmp_path = tempfile.mkstemp(dir=folder, prefix=prefix, suffix=".tmp")
+        os.close(fd)
+    try:
+        yield tmp_path
+        if directory:
+            # a folder can only be renamed over an empty one
+            shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+    finally:
+        if directory:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        elif os.path.exists(tmp_path):
+            os.remove(tmp_path)
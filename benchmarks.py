@@ -0,0 +1,359 @@
+"""
+Benchmarks of the app's hot paths on offline synthetic sessions (see synthetic_session.py).
+
+    python benchmarks.py --save                          # record benchmark_baseline.json
+    python benchmarks.py --compare                       # exit 1 on regressions against it
+    python benchmarks.py --sizes small --only strategy   # a subset
+
+Every case runs once untimed, then --repeats timed runs (median and min are reported),
+then once more under tracemalloc for the peak traced memory. Each size runs in its own
+temporary folder, so the stores under datastore/ and the FastF1 cache start cold and
+the real ones are never touched. Generated sessions are memoized, so most timings cover
+the app's code, not the generator; cases that measure something narrower or wider than
+their name suggests say so in the report (CASE_NOTES).
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import statistics
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+import fastf1
+import pandas as pd
+
+import atomic_write
+import cache_manager
+import event_catalog
+import plot_utils
+import render_cache
+import session_registry
+import standings_store
+import strategy_utils
+import synthetic_session
+import telemetry_store
+import telemetry_utils
+
+BASELINE_PATH = "benchmark_baseline.json"
+
+# A past season, so standings treat it as complete like the seasons users browse most
+YEAR = 2023
+
+# Fixture sizes: field size, race laps, telemetry sample rate and rounds in the season
+SIZES = {
+    "small": {"n_drivers": 10, "n_laps": 20, "sample_hz": 4.0, "rounds": 6},
+    "medium": {"n_drivers": 20, "n_laps": 57, "sample_hz": 4.0, "rounds": 12},
+    "large": {"n_drivers": 20, "n_laps": 78, "sample_hz": 10.0, "rounds": 24},
+}
+
+# A case regresses when it's this much slower / bigger than the baseline...
+THRESHOLD = 0.20
+# ...and the difference is above the noise floor
+MIN_DELTA_S = 0.002
+MIN_DELTA_MB = 0.5
+
+# Drivers shown together in the comparison chart (page 1)
+COMPARE_DRIVERS = 3
+
+CASES = {}
+CASE_NOTES = {}  # case -> what it actually measures, printed with the report
+
+
+def case(name, measures=None):
+    """Registers fn(fixture) -> (setup, run) as a benchmark; setup runs untimed before every run."""
+    def register(fn):
+        CASES[name] = fn
+        if measures:
+            CASE_NOTES[name] = measures
+        return fn
+    return register
+
+
+def _reset_stores():
+    shutil.rmtree("datastore", ignore_errors=True)
+
+
+# --- Loaders ---
+
+@case("load_session", measures="registry miss, session data reused (memoized): the app's load path only")
+def bench_load_session(fx):
+    # cold registry: results + laps + telemetry, as the Telemetry Viewer's first store miss
+    def setup():
+        session_registry._sessions.clear()
+    return setup, lambda: session_registry.get_session(YEAR, fx["event"], "R", needs=telemetry_store.TELEMETRY_NEEDS)
+
+
+@case("load_session[generated]",
+      measures="registry miss, session data generated from scratch: the offline stand-in for a cold load")
+def bench_load_session_generated(fx):
+    def setup():
+        session_registry._sessions.clear()
+        synthetic_session._memo.clear()
+    return setup, lambda: session_registry.get_session(YEAR, fx["event"], "R", needs=telemetry_store.TELEMETRY_NEEDS)
+
+
+@case("get_driver_telemetry")
+def bench_driver_telemetry(fx):
+    # store miss: fastest lap cut from the loaded session, then written to the store
+    def setup():
+        fx["session"]()
+        _reset_stores()
+    return setup, lambda: telemetry_store.fastest_lap_telemetry(YEAR, fx["event"], "R", fx["drivers"][0])
+
+
+@case("get_driver_telemetry[stored]")
+def bench_driver_telemetry_stored(fx):
+    def setup():
+        telemetry_store.fastest_lap_telemetry(YEAR, fx["event"], "R", fx["drivers"][0])
+    return setup, lambda: telemetry_store.fastest_lap_telemetry(YEAR, fx["event"], "R", fx["drivers"][0])
+
+
+@case("smooth_telemetry")
+def bench_smooth(fx):
+    return None, lambda: telemetry_utils.smooth_channels(fx["telemetry"](0), telemetry_utils.SMOOTHING_WINDOW_M)
+
+
+@case("load_standings_for_year")
+def bench_standings(fx):
+    # empty store: every round's results fetched, ledger and snapshots written
+    return _reset_stores, lambda: standings_store.refresh_snapshots(YEAR)
+
+
+@case("load_standings_for_year[stored]")
+def bench_standings_stored(fx):
+    return lambda: standings_store.refresh_snapshots(YEAR), lambda: standings_store.refresh_snapshots(YEAR)
+
+
+# --- Strategy Tools ---
+
+@case("strategy.pit_stops")
+def bench_pit_stops(fx):
+    return None, lambda: strategy_utils.pit_stops(fx["session"]().laps, fx["drivers"][0])
+
+
+@case("strategy.tire_stints")
+def bench_tire_stints(fx):
+    return None, lambda: strategy_utils.tire_stints(strategy_utils.lap_window(fx["session"]().laps, (1, 50)))
+
+
+@case("strategy.top_speeds")
+def bench_top_speeds(fx):
+    session = fx["session"]
+    return None, lambda: strategy_utils.top_speeds(session().laps, session().results, fx["drivers"])
+
+
+@case("strategy.sector_times")
+def bench_sector_times(fx):
+    return None, lambda: strategy_utils.sector_times(fx["session"]().laps, fx["drivers"][0], (1, 50))
+
+
+# --- Rendering ---
+
+def _compare_lines(fx):
+    drivers = fx["drivers"][:COMPARE_DRIVERS]
+    lines = []
+    for drv, color in zip(drivers, plot_utils.line_colors(len(drivers))):
+        plot = telemetry_utils.downsample(fx["telemetry"](drivers.index(drv)), ["Speed"], (10, 4))
+        lines.append((drv, plot["Distance"].to_numpy(), plot["Speed"].to_numpy(), color))
+    return lines
+
+
+def _render_compare(lines):
+    return render_cache.render("telemetry_compare", [(x, y) for _, x, y, _ in lines], {"title": "bench"},
+                               lambda: plot_utils.line_chart(lines, (10, 4), "bench", xlabel="Distance (m)"))
+
+
+@case("render.telemetry_compare")
+def bench_render_compare(fx):
+    # downsampling + drawing + PNG encoding of the page 1 comparison chart, cache miss
+    def setup():
+        render_cache._images.clear()
+    return setup, lambda: _render_compare(_compare_lines(fx))
+
+
+@case("render.telemetry_compare[cached]")
+def bench_render_compare_cached(fx):
+    return lambda: _render_compare(_compare_lines(fx)), lambda: _render_compare(_compare_lines(fx))
+
+
+@case("render.tire_strategy")
+def bench_render_stints(fx):
+    def setup():
+        render_cache._images.clear()
+
+    def run():
+        stints = strategy_utils.tire_stints(fx["session"]().laps)
+        drivers = list(dict.fromkeys(stints["Driver"]))
+        return render_cache.render("tire_strategy", stints, {"drivers": drivers}, lambda: plot_utils.stint_chart(
+            stints, drivers, strategy_utils.COMPOUND_COLORS, "bench"))
+    return setup, run
+
+
+# --- Runner ---
+
+def _fixture():
+    """Helpers shared by the cases of one size; the race is the season's first round."""
+    schedule = event_catalog.get_schedule(YEAR)
+    event = schedule.loc[schedule["RoundNumber"] == 1, "EventName"].iloc[0]
+    fx = {"event": event}
+    fx["session"] = lambda: session_registry.get_session(YEAR, event, "R", needs=telemetry_store.TELEMETRY_NEEDS)
+    fx["drivers"] = list(fx["session"]().results["Abbreviation"])
+    telemetry = {}
+
+    def lap_telemetry(i):
+        if i not in telemetry:
+            lap = fx["session"]().laps.pick_driver(fx["drivers"][i]).pick_fastest()
+            telemetry[i] = lap.get_telemetry()
+        return telemetry[i]
+    fx["telemetry"] = lap_telemetry
+    return fx
+
+
+def _measure(setup, run, repeats):
+    def once():
+        if setup:
+            setup()
+        gc.collect()
+        started = time.perf_counter()
+        run()
+        return time.perf_counter() - started
+
+    once()  # warm-up: imports, memoized fixtures, first-call overheads
+    timings = [once() for _ in range(repeats)]
+
+    if setup:
+        setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"median_s": statistics.median(timings), "min_s": min(timings), "peak_mb": peak / 1024 ** 2}
+
+
+def _reset_memory_caches():
+    session_registry._sessions.clear()
+    event_catalog._schedules.clear()
+    render_cache._images.clear()
+
+
+def run_benchmarks(sizes, names, repeats):
+    """{'<size>/<case>': {median_s, min_s, peak_mb}} for every size and case."""
+    results = {}
+    home = os.getcwd()
+    for name in names:
+        if name in CASE_NOTES:
+            print(f"ℹ️ {name}: {CASE_NOTES[name]}")
+    for size in sizes:
+        params = dict(SIZES[size])
+        rounds = params.pop("rounds")
+        workdir = tempfile.mkdtemp(prefix=f"f1bench_{size}_")
+        print(f"🏎️ {size}: {params['n_drivers']} drivers, {params['n_laps']} laps, "
+              f"{params['sample_hz']:g} Hz, {rounds} rounds")
+        try:
+            os.chdir(workdir)
+            cache_manager.enable_cache(os.path.join(workdir, "fastf1cache"))
+            _reset_memory_caches()
+            with synthetic_session.installed(n_rounds=rounds, memoize=True, **params):
+                fx = _fixture()
+                for name in names:
+                    result = _measure(*CASES[name](fx), repeats)
+                    results[f"{size}/{name}"] = result
+                    print(f"  {name:<36} {result['median_s'] * 1000:9.2f} ms  (min {result['min_s'] * 1000:.2f})"
+                          f"  peak {result['peak_mb']:7.1f} MB")
+        finally:
+            os.chdir(home)
+            _reset_memory_caches()
+            synthetic_session._memo.clear()
+            shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def save_baseline(results, path, repeats):
+    baseline = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()}",
+        "versions": {"fastf1": fastf1.__version__, "pandas": pd.__version__},
+        "repeats": repeats,
+        "sizes": SIZES,
+        "results": results,
+    }
+    with atomic_write.temp_path(path) as tmp_path, open(tmp_path, "w") as f:
+        json.dump(baseline, f, indent=1, sort_keys=True)
+    print(f"💾 Baseline written to {path}")
+
+
+def compare(results, baseline, threshold=THRESHOLD):
+    """
+    Prints every case next to its baseline; returns the keys that regressed in time
+    (median) or peak memory by more than `threshold` and the noise floor.
+    """
+    regressions = []
+    print(f"\n{'case':<44} {'baseline':>10} {'now':>10} {'change':>8}   {'peak MB':>15}")
+    for key, now in results.items():
+        base = baseline.get(key)
+        if base is None:
+            print(f"{key:<44} {'-':>10} {now['median_s'] * 1000:8.2f}ms   (new)")
+            continue
+        change = now["median_s"] / base["median_s"] - 1 if base["median_s"] else 0.0
+        slower = change > threshold and now["median_s"] - base["median_s"] > MIN_DELTA_S
+        bigger = (now["peak_mb"] > base["peak_mb"] * (1 + threshold)
+                  and now["peak_mb"] - base["peak_mb"] > MIN_DELTA_MB)
+        flag = "❌" if slower or bigger else ("🚀" if change < -threshold else "  ")
+        print(f"{key:<44} {base['median_s'] * 1000:8.2f}ms {now['median_s'] * 1000:8.2f}ms {change:+8.0%}   "
+              f"{base['peak_mb']:6.1f} -> {now['peak_mb']:6.1f} {flag}")
+        if slower or bigger:
+            regressions.append(key)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the app's hot paths on synthetic sessions.")
+    parser.add_argument("--sizes", nargs="+", default=list(SIZES), choices=list(SIZES),
+                        help="fixture sizes (default: all)")
+    parser.add_argument("--only", nargs="+", metavar="NAME",
+                        help=f"cases whose name starts with any of these (cases: {', '.join(CASES)})")
+    parser.add_argument("--repeats", type=int, default=5, help="timed runs per case (default: 5)")
+    parser.add_argument("--save", nargs="?", const=BASELINE_PATH, metavar="PATH",
+                        help=f"write the results as a baseline (default path: {BASELINE_PATH})")
+    parser.add_argument("--compare", nargs="?", const=BASELINE_PATH, metavar="PATH",
+                        help=f"compare against a baseline; exit 1 on regressions (default path: {BASELINE_PATH})")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help=f"allowed slowdown / memory growth as a fraction (default: {THRESHOLD})")
+    args = parser.parse_args(argv)
+
+    names = [n for n in CASES if not args.only or any(n.startswith(p) for p in args.only)]
+    if not names:
+        parser.error(f"no case matches {args.only}")
+    baseline = None
+    if args.compare:
+        # read before running, so --compare and --save can point at the same file
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+
+    # FastF1 deprecation notices and info logs would drown the report
+    warnings.simplefilter("ignore", FutureWarning)
+    fastf1.set_log_level("WARNING")
+
+    results = run_benchmarks(args.sizes, names, max(1, args.repeats))
+    if args.save:
+        save_baseline(results, args.save, args.repeats)
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+        print(f"\n✅ No regressions over {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
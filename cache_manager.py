@@ -0,0 +1,198 @@
+import os
+import shutil
+import threading
+
+import fastf1
+
+from single_flight import SingleFlight
+
+# One FastF1 cache for the whole app (main.py warmup, fastf1_utils and every page)
+CACHE_DIR = os.environ.get("F1_CACHE_DIR", "fastf1cache")
+
+# Disk budget for the cache; least recently used sessions are evicted above it
+CACHE_BUDGET_MB = float(os.environ.get("F1_CACHE_BUDGET_MB", "4096"))
+
+_lock = threading.Lock()
+_evict_lock = threading.Lock()
+_enabled_dir = None
+_evict_on_load = True  # False in pool workers: their parent process trims the cache
+_in_use = {}  # session cache folder -> number of loads currently running
+_stats = {"hits": 0, "misses": 0, "evicted_sessions": 0, "evicted_bytes": 0}
+# concurrent loads of the same session (warmup threads, standings, users) run once
+_load_flights = SingleFlight()
+
+
+def enable_cache(cache_dir=None, evict=None):
+    """
+    Enables the shared FastF1 cache. Safe to call on every Streamlit rerun:
+    FastF1 is only (re)configured when the folder changes.
+
+    evict=False stops this process from trimming the cache after its downloads (for pool
+    workers: which sessions are being loaded is only known per process, so the parent
+    trims instead). None keeps the current setting.
+    """
+    global _enabled_dir, _evict_on_load
+    if evict is not None:
+        _evict_on_load = evict
+    cache_dir = cache_dir or _enabled_dir or CACHE_DIR
+    with _lock:
+        if _enabled_dir != cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            fastf1.Cache.enable_cache(cache_dir)
+            _enabled_dir = cache_dir
+    return cache_dir
+
+
+def cache_root():
+    return _enabled_dir or CACHE_DIR
+
+
+def session_cache_dir(session):
+    # FastF1 stores a session's pickles under <cache>/<api_path without '/static/'>
+    return os.path.join(cache_root(), session.api_path[8:])
+
+
+def _count_cache_files(path):
+    if not os.path.isdir(path):
+        return 0
+    return sum(1 for name in os.listdir(path) if name.endswith('.ff1pkl'))
+
+
+def _is_unloaded(session):
+    return not hasattr(session, '_results')
+
+
+def load_session(session, **load_kwargs):
+    """
+    Runs session.load(**load_kwargs) through the cache manager.
+    Counts a hit when FastF1 needed no new cache files, stamps the session as
+    recently used and trims the cache back under budget after a download.
+
+    Concurrent loads of the same session with the same options are single-flight:
+    only one thread downloads and parses, the others get its loaded session back.
+    Always use the returned session.
+    """
+    enable_cache()
+    path = session_cache_dir(session)
+    # spell out FastF1's defaults so load() and load(laps=True, ...) share a flight
+    options = {"laps": True, "telemetry": True, "weather": True, "messages": True, **load_kwargs}
+    flight_key = (path, tuple(sorted(options.items())))
+    loaded = _load_flights.do(flight_key, lambda: _tracked_load(session, path, load_kwargs))
+    if loaded is session or _is_unloaded(session):
+        return loaded
+    # our session already holds other data, so load on top of it; the
+    # shared load has just filled the disk cache, which makes this cheap
+    return _tracked_load(session, path, load_kwargs)
+
+
+def _tracked_load(session, path, load_kwargs):
+    files_before = _count_cache_files(path)
+    with _lock:
+        _in_use[path] = _in_use.get(path, 0) + 1
+    try:
+        session.load(**load_kwargs)
+    finally:
+        with _lock:
+            _in_use[path] -= 1
+            if not _in_use[path]:
+                del _in_use[path]
+
+    hit = files_before > 0 and _count_cache_files(path) == files_before
+    with _lock:
+        _stats["hits" if hit else "misses"] += 1
+    if os.path.isdir(path):
+        os.utime(path)  # folder mtime is the LRU timestamp
+    if not hit and _evict_on_load:
+        enforce_budget()
+    return session
+
+
+def _dir_size(path):
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, name))
+            except OSError:
+                pass
+    return total
+
+
+def _subdirs(path):
+    try:
+        return [entry.path for entry in os.scandir(path) if entry.is_dir()]
+    except OSError:
+        return []
+
+
+def cached_sessions():
+    """Lists (path, size_bytes, last_used) for every session folder in the cache."""
+    sessions = []
+    for year_dir in _subdirs(cache_root()):
+        for event_dir in _subdirs(year_dir):
+            for session_dir in _subdirs(event_dir):
+                try:
+                    last_used = os.stat(session_dir).st_mtime
+                except OSError:
+                    continue
+                sessions.append((session_dir, _dir_size(session_dir), last_used))
+    return sessions
+
+
+def enforce_budget(budget_mb=None, protect=()):
+    """
+    Evicts least recently used sessions until the session folders fit the disk budget.
+    Sessions that are being loaded right now in this process, and the folders in
+    `protect` (e.g. sessions worker processes are loading), are never evicted.
+    Returns the number of evicted sessions.
+    """
+    budget = (budget_mb if budget_mb is not None else CACHE_BUDGET_MB) * 1024 ** 2
+    if not _evict_lock.acquire(blocking=False):
+        return 0  # another thread is already trimming the cache
+    try:
+        # only session folders count: FastF1's HTTP cache (sqlite) is never evicted, so
+        # counting it would make every miss evict everything once it nears the budget
+        sessions = cached_sessions()
+        total = sum(size for _, size, _ in sessions)
+        if total <= budget:
+            return 0
+
+        protect = {os.path.normpath(p) for p in protect if p}
+        evicted = 0
+        for path, size, _ in sorted(sessions, key=lambda s: s[2]):
+            if total <= budget:
+                break
+            if os.path.normpath(path) in protect:
+                continue
+            with _lock:
+                if path in _in_use:
+                    continue
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            evicted += 1
+            with _lock:
+                _stats["evicted_sessions"] += 1
+                _stats["evicted_bytes"] += size
+            # drop the event folder too once its last session is gone
+            try:
+                os.rmdir(os.path.dirname(path))
+            except OSError:
+                pass
+        if evicted:
+            print(f"🧹 Evicted {evicted} cached session(s) to stay under {budget / 1024 ** 2:.0f} MB")
+        return evicted
+    finally:
+        _evict_lock.release()
+
+
+def cache_stats():
+    """Hit/miss/eviction counters plus current disk usage of the shared cache."""
+    with _lock:
+        stats = dict(_stats)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+    stats["disk_mb"] = _dir_size(cache_root()) / 1024 ** 2
+    stats["budget_mb"] = CACHE_BUDGET_MB
+    stats["cache_dir"] = cache_root()
+    stats["shared_loads"] = _load_flights.stats["shared"]
+    return stats
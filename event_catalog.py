@@ -0,0 +1,153 @@
+import os
+import threading
+import time
+
+import fastf1
+import pandas as pd
+
+import atomic_write
+
+# Persisted schedules, used when the API can't be reached
+STORE_DIR = os.path.join("datastore", "catalog")
+
+# How long a schedule of the current (or a future) season is trusted before refreshing
+SCHEDULE_TTL_S = float(os.environ.get("F1_SCHEDULE_TTL_S", str(6 * 3600)))
+
+# After a failed fetch with nothing to fall back on, wait this long before trying again
+FAILURE_RETRY_S = 60
+
+# First season with full FastF1 timing data
+FIRST_SEASON = 2018
+
+# Session codes offered by the pages, in display order
+SESSION_CODES = {'Q': 'Qualifying', 'R': 'Race', 'S': 'Sprint'}
+
+_lock = threading.Lock()
+_schedules = {}  # year -> (fetched_at, schedule)
+_failures = {}  # year -> (failed_at, exception)
+
+
+def schedule_path(year):
+    return os.path.join(STORE_DIR, f"schedule_{year}.parquet")
+
+
+def _is_past_season(year):
+    return year < pd.Timestamp.now().year
+
+
+def _local_date_columns(schedule):
+    # Session<N>Date: session-local times, one UTC offset per row (the *DateUtc columns are naive UTC)
+    return [c for c in schedule.columns if c.startswith('Session') and c.endswith('Date') and c[7:-4].isdigit()]
+
+
+def _persist_schedule(schedule, path):
+    """
+    Writes the schedule copy used when the API is down. Local session dates are stored as
+    ISO strings: Parquet would coerce their mixed offsets to the first row's.
+    """
+    stored = schedule.copy()
+    for col in _local_date_columns(stored):
+        stored[col] = stored[col].map(lambda v: None if pd.isna(v) else pd.Timestamp(v).isoformat())
+    with atomic_write.temp_path(path) as tmp_path:
+        stored.to_parquet(tmp_path, index=False)
+
+
+def _read_stored_schedule(path):
+    stored = pd.read_parquet(path)
+    for col in _local_date_columns(stored):
+        # back to per-row Timestamps with their own offsets, as fastf1 returns them
+        stored[col] = stored[col].map(lambda v: pd.Timestamp(v) if isinstance(v, str) else pd.NaT).astype(object)
+    return stored
+
+
+def _fetch_schedule(year):
+    schedule = pd.DataFrame(fastf1.get_event_schedule(year, include_testing=False))
+    try:
+        _persist_schedule(schedule, schedule_path(year))
+    except Exception as e:
+        # the local copy is only a fallback; a read-only or full disk mustn't cost the fetched schedule
+        print(f"⚠️ Could not store the {year} schedule: {e}")
+    return schedule
+
+
+def get_schedule(year):
+    """
+    Event schedule of a season (testing excluded).
+    Kept in memory for SCHEDULE_TTL_S; past seasons never expire once persisted.
+    Falls back to the persisted copy (then to a stale in-memory one) when FastF1 fails.
+    """
+    year = int(year)
+    now = time.monotonic()
+    with _lock:
+        cached = _schedules.get(year)
+    if cached is not None and (_is_past_season(year) or now - cached[0] < SCHEDULE_TTL_S):
+        return cached[1]
+
+    path = schedule_path(year)
+    if cached is None and _is_past_season(year) and os.path.isfile(path):
+        schedule = _read_stored_schedule(path)
+    else:
+        with _lock:
+            failure = _failures.get(year)
+        if cached is None and failure is not None and now - failure[0] < FAILURE_RETRY_S:
+            raise failure[1]
+        try:
+            schedule = _fetch_schedule(year)
+        except Exception as e:
+            if cached is not None:
+                schedule = cached[1]
+            elif os.path.isfile(path):
+                schedule = _read_stored_schedule(path)
+            else:
+                with _lock:
+                    _failures[year] = (now, e)
+                raise
+            print(f"⚠️ Using stored {year} schedule, refresh failed: {e}")
+
+    with _lock:
+        _schedules[year] = (now, schedule)
+    return schedule
+
+
+def seasons(first=FIRST_SEASON):
+    """Seasons from `first` up to the current one."""
+    return list(range(first, pd.Timestamp.now().year + 1))
+
+
+def event_names(year, past_only=False):
+    """
+    Grand Prix names of a season in round order.
+    past_only keeps only events that have started (falls back to the full list if none have).
+    """
+    try:
+        schedule = get_schedule(year)
+    except Exception as e:
+        print(f"⚠️ No schedule for {year}: {e}")
+        return []
+    schedule = schedule.sort_values('RoundNumber')
+    if past_only:
+        started = schedule[_first_session_dates(schedule) <= pd.Timestamp.now()]
+        if not started.empty:
+            schedule = started
+    return schedule['EventName'].tolist()
+
+
+def _first_session_dates(schedule):
+    if 'Session1DateUtc' in schedule.columns:
+        return pd.to_datetime(schedule['Session1DateUtc']).fillna(schedule['EventDate'])
+    return schedule['EventDate']
+
+
+def available_sessions(year, event):
+    """Session codes from SESSION_CODES that take place at an event (e.g. no 'S' without a sprint)."""
+    try:
+        schedule = get_schedule(year)
+    except Exception:
+        return list(SESSION_CODES)
+    row = schedule[schedule['EventName'] == event]
+    if row.empty:
+        return list(SESSION_CODES)
+    session_cols = [c for c in schedule.columns if c.startswith('Session') and c[7:].isdigit()]
+    names = set(row.iloc[0][session_cols].dropna())
+    codes = [code for code, name in SESSION_CODES.items() if name in names]
+    return codes or list(SESSION_CODES)
@@ -0,0 +1,191 @@
+"""
+Headless bulk export of seasons to columnar files.
+
+    python export_seasons.py --seasons 2023-2024 --sessions R Q --workers 8
+
+Every (season, round, session) is loaded in its own worker process and written to
+<out>/<year>/<round>_<event>/<session>/ as results.parquet, laps.parquet and
+telemetry.parquet (car data of every lap, with Driver, LapNumber and in-lap Distance).
+Finished sessions are recorded in <out>/manifest.json; re-running the same command
+resumes where it stopped.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import fastf1
+import numpy as np
+import pandas as pd
+
+import atomic_write
+import cache_manager
+import event_catalog
+import lap_tensor
+import telemetry_export
+from run_manifest import RunManifest, session_key
+
+# Default output folder of the exported dataset
+EXPORT_DIR = os.path.join("datastore", "export")
+
+
+def parse_numbers(text):
+    """'2022-2024' -> [2022, 2023, 2024]; '1-3,7' -> [1, 2, 3, 7]."""
+    numbers = []
+    for part in str(text).split(","):
+        if "-" in part:
+            first, last = part.split("-")
+            numbers.extend(range(int(first), int(last) + 1))
+        elif part.strip():
+            numbers.append(int(part))
+    return numbers
+
+
+def session_dir(out_dir, year, rnd, event, session_type):
+    slug = str(event).strip().replace(" ", "_").replace("/", "-")
+    return os.path.join(out_dir, str(year), f"{int(rnd):02d}_{slug}", session_type)
+
+
+def plan_jobs(seasons, rounds=None, session_types=("R",)):
+    """(year, round, event, session type) of every past session matching the filters."""
+    jobs = []
+    for year in seasons:
+        schedule = event_catalog.get_schedule(year).sort_values("RoundNumber")
+        schedule = schedule[schedule["EventDate"] <= pd.Timestamp.now()]
+        for _, event in schedule.iterrows():
+            rnd = int(event["RoundNumber"])
+            if rnd < 1 or (rounds and rnd not in rounds):
+                continue
+            available = event_catalog.available_sessions(year, event["EventName"])
+            jobs.extend((year, rnd, event["EventName"], st) for st in session_types if st in available)
+    return jobs
+
+
+def _seconds(values):
+    return pd.to_timedelta(values).dt.total_seconds().to_numpy()
+
+
+def lap_telemetry_frames(session):
+    """
+    Car data of every driver cut into laps, one frame per driver.
+    Samples are assigned to laps with one searchsorted over the lap start times; Distance
+    restarts at 0 on every lap.
+    """
+    laps = session.laps.dropna(subset=["LapNumber", "LapStartTime", "Time"])
+    for number, car_data in session.car_data.items():
+        drv_laps = laps[laps["DriverNumber"].astype(str) == str(number)].sort_values("LapStartTime")
+        if drv_laps.empty or car_data.empty:
+            continue
+        t = _seconds(car_data["SessionTime"])
+        lap_start, lap_end = _seconds(drv_laps["LapStartTime"]), _seconds(drv_laps["Time"])
+        idx = np.searchsorted(lap_start, t, side="right") - 1
+        valid = (idx >= 0) & (t <= lap_end[np.clip(idx, 0, None)])
+        if not valid.any():
+            continue
+
+        frame = pd.DataFrame(car_data)[valid].reset_index(drop=True)
+        lap_number = drv_laps["LapNumber"].to_numpy(dtype=int)[idx[valid]]
+        step = frame["Speed"].to_numpy(dtype=float) / 3.6 * np.diff(t[valid], prepend=t[valid][:1])
+        step[np.r_[True, lap_number[1:] != lap_number[:-1]]] = 0.0
+        frame.insert(0, "Driver", drv_laps["Driver"].iloc[0])
+        frame.insert(1, "LapNumber", lap_number)
+        frame["Distance"] = pd.Series(step).groupby(lap_number).cumsum().to_numpy()
+        yield frame
+
+
+def _write_parquet(frame, path):
+    with atomic_write.temp_path(path) as tmp_path:
+        pd.DataFrame(frame).to_parquet(tmp_path, index=False)
+
+
+def export_session(year, rnd, event, session_type, out_dir, telemetry=True, tensors=False):
+    """
+    Worker: loads one session and writes its files. Everything goes to a temp folder that
+    replaces the final one at the end, so a crash never leaves a half-written session.
+    Returns a small summary for the manifest.
+    """
+    started = time.time()
+    session = fastf1.get_session(year, rnd, session_type)
+    session = cache_manager.load_session(session, laps=True, telemetry=telemetry, weather=False, messages=False)
+
+    with atomic_write.temp_path(session_dir(out_dir, year, rnd, event, session_type), directory=True) as tmp_dir:
+        _write_parquet(session.results, os.path.join(tmp_dir, "results.parquet"))
+        _write_parquet(session.laps, os.path.join(tmp_dir, "laps.parquet"))
+        if telemetry:
+            with open(os.path.join(tmp_dir, "telemetry.parquet"), "wb") as sink:
+                telemetry_export.write_export(lap_telemetry_frames(session), "Parquet", sink)
+            if tensors:
+                lap_tensor.build_tensor(session, year, event, session_type)
+    return {"event": event, "laps": len(session.laps), "seconds": round(time.time() - started, 1)}
+
+
+def _cache_dir_of(job, known):
+    # cache folder a job's worker loads into; resolved once per job in the parent
+    if job not in known:
+        year, rnd, _, session_type = job
+        try:
+            known[job] = cache_manager.session_cache_dir(fastf1.get_session(year, rnd, session_type))
+        except Exception:
+            known[job] = None
+    return known[job]
+
+
+def run_export(jobs, out_dir=EXPORT_DIR, workers=None, telemetry=True, tensors=False, force=False, cache_dir=None):
+    """
+    Runs export_session for every job on a process pool, checkpointing to <out_dir>/manifest.json.
+    Workers never evict from the FastF1 cache; the cache is trimmed here after every finished
+    session, sparing the sessions workers are still loading.
+    """
+    manifest = RunManifest(os.path.join(out_dir, "manifest.json"))
+    todo = [job for job in jobs if force or not manifest.is_completed(session_key(*job[:2], job[3]))]
+    print(f"📦 {len(todo)} sessions to export ({len(jobs) - len(todo)} already done)")
+    if not todo:
+        return manifest
+
+    started = time.time()
+    cache_dirs = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=cache_manager.enable_cache,
+                             initargs=(cache_dir, False)) as pool:
+        futures = {pool.submit(export_session, year, rnd, event, st, out_dir, telemetry, tensors): (year, rnd, event, st)
+                   for year, rnd, event, st in todo}
+        for done, future in enumerate(as_completed(futures), start=1):
+            year, rnd, event, st = futures[future]
+            key = session_key(year, rnd, st)
+            try:
+                manifest.mark_completed(key, future.result())
+                print(f"✅ [{done}/{len(todo)}] {year} {event} {st}")
+            except Exception as e:
+                manifest.mark_failed(key, e)
+                print(f"❌ [{done}/{len(todo)}] {year} {event} {st}: {e}")
+            running = [job for fut, job in futures.items() if fut.running()]
+            cache_manager.enforce_budget(protect=[_cache_dir_of(job, cache_dirs) for job in running])
+    print(f"🏁 Export finished in {time.time() - started:.0f}s "
+          f"({len(manifest.completed)} done, {len(manifest.failed)} failed)")
+    return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export F1 seasons (results, laps, per-lap telemetry) to Parquet.")
+    parser.add_argument("--seasons", required=True, help="e.g. 2024 or 2022-2024")
+    parser.add_argument("--rounds", help="e.g. 1-5,8 (default: every past round)")
+    parser.add_argument("--sessions", nargs="+", default=["R"], choices=list(event_catalog.SESSION_CODES),
+                        help="session codes (default: R)")
+    parser.add_argument("--out", default=EXPORT_DIR, help=f"output folder (default: {EXPORT_DIR})")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="worker processes; each holds one full session in memory")
+    parser.add_argument("--cache-dir", help="FastF1 cache folder (default: F1_CACHE_DIR)")
+    parser.add_argument("--no-telemetry", action="store_true", help="only export results and laps")
+    parser.add_argument("--tensors", action="store_true", help="also build lap tensors (datastore/tensors)")
+    parser.add_argument("--force", action="store_true", help="re-export sessions the manifest marks as done")
+    args = parser.parse_args(argv)
+
+    cache_manager.enable_cache(args.cache_dir)
+    jobs = plan_jobs(parse_numbers(args.seasons), set(parse_numbers(args.rounds)) if args.rounds else None,
+                     args.sessions)
+    manifest = run_export(jobs, args.out, args.workers, telemetry=not args.no_telemetry,
+                          tensors=args.tensors, force=args.force, cache_dir=args.cache_dir)
+    return 1 if manifest.failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,47 +1,69 @@
 import fastf1
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import as_completed
+import cache_manager
+import warmup_scheduler
 
-# Enable FastF1 cache globally
-fastf1.Cache.enable_cache('fastf1cache')
+# Enable the shared FastF1 cache globally
+cache_manager.enable_cache()
 
-# You can control max threads here (try 4–8)
-executor = ThreadPoolExecutor(max_workers=6)
-
-def preload_sessions(years, rounds, progress_callback=None, timeout=60):
+def preload_sessions(years, rounds, progress_callback=None, timeout=60,
+                     priority=warmup_scheduler.WARMUP, session_types=('R',)):
     """
-    Preloads FastF1 sessions in parallel for specified years and rounds.
+    Preloads FastF1 sessions in the background for specified years and rounds.
     Example: preload_sessions([2024], range(1,5))
 
+    Jobs go through the shared warmup scheduler, so they yield to interactive loads.
+    The worker count is set there (F1_WARMUP_WORKERS).
+
     progress_callback: optional callable completed, total -> None
+    priority: warmup_scheduler.WARMUP (default) or warmup_scheduler.PREFETCH
     """
     rounds_list = list(rounds)
-    total = len(years) * len(rounds_list)
+    keys = [(year, rnd, st) for year in years for rnd in rounds_list for st in session_types]
+    preload_keys(keys, progress_callback=progress_callback, timeout=timeout, priority=priority)
+
+def preload_keys(keys, progress_callback=None, result_callback=None, timeout=60,
+                 priority=warmup_scheduler.WARMUP, full=False):
+    """
+    Preloads an explicit list of (year, round, session type) keys; returns the failed keys.
+
+    progress_callback: optional callable completed, total -> None
+    result_callback: optional callable key, error -> None (error is None on success)
+    full: load laps and telemetry too instead of results only
+    """
+    total = len(keys)
     if total == 0:
-        return
+        return []
 
-    futures = {executor.submit(_load_session, year, rnd): (year, rnd)
-               for year in years for rnd in rounds_list}
+    futures = {warmup_scheduler.submit(_load_session, *key, full=full, priority=priority): key
+               for key in keys}
 
+    failed = []
     completed = 0
     for fut in as_completed(futures):
-        yr, rnd = futures[fut]
+        key = futures[fut]
+        error = None
         try:
             fut.result(timeout=timeout)
         except Exception as e:
-            print(f"⚠️ Failed preload {yr} R{rnd}: {e}")
+            error = e
+            failed.append(key)
+            print(f"⚠️ Failed preload {key[0]} R{key[1]} {key[2]}: {e}")
         completed += 1
-        if progress_callback:
-            try:
-                progress_callback(completed, total)
-            except Exception:
-                # don't let callback failures stop the preload
-                pass
-
-def _load_session(year, rnd):
-    try:
-        sess = fastf1.get_session(year, rnd, 'Race')
+        # don't let callback failures stop the preload
+        for callback, args in ((result_callback, (key, error)), (progress_callback, (completed, total))):
+            if callback:
+                try:
+                    callback(*args)
+                except Exception:
+                    pass
+    return failed
+
+def _load_session(year, rnd, session_type='R', full=False):
+    sess = fastf1.get_session(year, rnd, session_type)
+    if full:
+        cache_manager.load_session(sess, weather=False, messages=False)
+    else:
         # load only results/metadata to keep it light
-        sess.load(laps=False, telemetry=False, weather=False)
-        print(f"✅ Cached: {year} Round {rnd}")
-    except Exception as e:
-        print(f"❌ Error loading {year} Round {rnd}: {e}")
+        cache_manager.load_session(sess, laps=False, telemetry=False, weather=False, messages=False)
+    print(f"✅ Cached: {year} Round {rnd} {session_type}")
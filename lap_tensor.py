@@ -0,0 +1,222 @@
+import json
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import atomic_write
+import session_registry
+from telemetry_utils import resample_laps
+
+# Root folder of the per-session lap tensors.
+# Layout: datastore/tensors/<year>/<event>/<session>.npy (+ <session>_laps.parquet index)
+STORE_DIR = os.path.join("datastore", "tensors")
+
+# Spacing of the distance grid every lap is resampled onto (metres)
+GRID_STEP_M = 10.0
+
+# Channels along the last tensor axis; Time is seconds since the start of the lap
+CHANNELS = ['Time', 'Speed', 'Throttle', 'Brake', 'RPM', 'nGear', 'DRS']
+
+# Lap metadata kept in the index, one row per lap stored in the tensor
+LAP_INDEX_COLUMNS = ['DriverIndex', 'LapIndex', 'Driver', 'LapNumber', 'LapTime',
+                     'Stint', 'Compound', 'TyreLife', 'PitIn', 'PitOut', 'IsAccurate']
+_TENSOR_META_KEY = b'f1_tensor'
+
+TENSOR_NEEDS = {session_registry.LAPS, session_registry.TELEMETRY}
+
+
+def _slug(value):
+    return str(value).strip().replace(' ', '_').replace('/', '-')
+
+
+def tensor_path(year, event, session_type):
+    return os.path.join(STORE_DIR, str(year), _slug(event), f"{_slug(session_type)}.npy")
+
+
+def lap_index_path(year, event, session_type):
+    return os.path.join(STORE_DIR, str(year), _slug(event), f"{_slug(session_type)}_laps.parquet")
+
+
+def _seconds(values):
+    return pd.to_timedelta(values).dt.total_seconds().to_numpy() if len(values) else np.array([])
+
+
+def _split_laps(car_data, laps):
+    """
+    Cuts one driver's session-long car data into laps.
+    Distance is integrated once over the whole session and re-based at every lap start,
+    so no per-lap telemetry objects are built. Every lap keeps the sample before its start
+    and after its end, so 0 m / 0 s falls on the line instead of on the first sample.
+    Returns (kept lap rows, distances, channels).
+    """
+    session_time = _seconds(car_data['SessionTime'])
+    speed = car_data['Speed'].to_numpy(dtype=float)
+    cumulative = np.cumsum(speed / 3.6 * np.diff(session_time, prepend=session_time[:1]))
+
+    lap_start = _seconds(laps['LapStartTime'])
+    starts = np.searchsorted(session_time, lap_start, side='left')
+    ends = np.searchsorted(session_time, _seconds(laps['Time']), side='right')
+    keep = np.flatnonzero(ends - starts >= 2)
+    # distance covered at the exact lap start, between the two samples around it
+    start_distance = np.interp(lap_start, session_time, cumulative)
+    starts, ends = np.maximum(starts - 1, 0), np.minimum(ends + 1, len(session_time))
+
+    distances = [cumulative[starts[i]:ends[i]] - start_distance[i] for i in keep]
+    channels = {'Time': [session_time[starts[i]:ends[i]] - lap_start[i] for i in keep]}
+    for name in CHANNELS[1:]:
+        values = (car_data[name].to_numpy(dtype=float) if name in car_data.columns
+                  else np.full(len(car_data), np.nan))
+        channels[name] = [values[starts[i]:ends[i]] for i in keep]
+    return laps.iloc[keep], distances, channels
+
+
+def _lap_index(laps, driver_index):
+    column = lambda name: laps[name].to_numpy() if name in laps.columns else None
+    return pd.DataFrame({
+        'DriverIndex': driver_index,
+        'LapIndex': laps['LapNumber'].to_numpy(dtype=int) - 1,
+        'Driver': column('Driver'),
+        'LapNumber': laps['LapNumber'].to_numpy(dtype=int),
+        'LapTime': _seconds(laps['LapTime']) if 'LapTime' in laps.columns else None,
+        'Stint': column('Stint'),
+        'Compound': column('Compound'),
+        'TyreLife': column('TyreLife'),
+        'PitIn': laps['PitInTime'].notna().to_numpy() if 'PitInTime' in laps.columns else False,
+        'PitOut': laps['PitOutTime'].notna().to_numpy() if 'PitOutTime' in laps.columns else False,
+        'IsAccurate': column('IsAccurate'),
+    }, columns=LAP_INDEX_COLUMNS)
+
+
+def build_tensor(session, year, event, session_type, step=GRID_STEP_M):
+    """
+    Resamples every lap of every driver onto one distance grid and writes a
+    drivers x laps x grid x channels float32 array (.npy, memory-mappable) plus the lap index.
+    Laps without car data stay NaN. The session needs laps and telemetry loaded.
+    """
+    laps = session.laps.dropna(subset=['LapNumber', 'LapStartTime', 'Time'])
+    drivers = list(dict.fromkeys(laps['Driver']))
+    n_laps = int(laps['LapNumber'].max()) if len(laps) else 0
+
+    per_driver = []
+    for drv in drivers:
+        drv_laps = laps[laps['Driver'] == drv].sort_values('LapNumber')
+        car_data = session.car_data.get(str(drv_laps['DriverNumber'].iloc[0]))
+        if car_data is None or car_data.empty:
+            continue
+        per_driver.append((drivers.index(drv),) + _split_laps(car_data, drv_laps))
+
+    lengths = np.concatenate([[d[-1] for d in distances] for _, _, distances, _ in per_driver if distances] or [[0.0]])
+    # the grid covers a normal lap; longer (e.g. pit lane) stretches are cut off
+    grid = np.arange(0.0, np.quantile(lengths, 0.95) + step, step)
+
+    path = tensor_path(year, event, session_type)
+    index_path = lap_index_path(year, event, session_type)
+    index = []
+    with atomic_write.temp_path(path) as tmp_path:
+        tensor = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float32,
+                                           shape=(len(drivers), n_laps, len(grid), len(CHANNELS)))
+        tensor[:] = np.nan
+        for driver_index, kept, distances, channels in per_driver:
+            if not distances:
+                continue
+            # one vectorized resampling pass per driver, written straight into the mapped file
+            resampled = resample_laps(distances, channels, grid)
+            lap_index = kept['LapNumber'].to_numpy(dtype=int) - 1
+            tensor[driver_index, lap_index] = np.stack([resampled[name] for name in CHANNELS], axis=-1)
+            index.append(_lap_index(kept, driver_index))
+        tensor.flush()
+        del tensor
+
+    # the index is written last: a tensor only counts as stored once its index exists
+    index = pd.concat(index, ignore_index=True) if index else pd.DataFrame(columns=LAP_INDEX_COLUMNS)
+    table = pa.Table.from_pandas(index, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[_TENSOR_META_KEY] = json.dumps({'drivers': drivers, 'channels': CHANNELS, 'step': step}).encode()
+    with atomic_write.temp_path(index_path) as tmp_index:
+        pq.write_table(table.replace_schema_metadata(metadata), tmp_index)
+    return load_tensor(year, event, session_type)
+
+
+def load_tensor(year, event, session_type):
+    """
+    Opens a stored lap tensor without reading it into memory.
+    Returns a dict with 'tensor' (read-only memmap, drivers x laps x grid x channels),
+    'laps' (lap index), 'drivers', 'channels' and 'grid', or None when not stored yet.
+    """
+    path = tensor_path(year, event, session_type)
+    index_path = lap_index_path(year, event, session_type)
+    if not (os.path.isfile(path) and os.path.isfile(index_path)):
+        return None
+    try:
+        table = pq.read_table(index_path)
+        meta = json.loads(table.schema.metadata[_TENSOR_META_KEY])
+        tensor = np.load(path, mmap_mode='r')
+    except (OSError, ValueError, KeyError, pa.ArrowInvalid):
+        # corrupt / partial files: treat as a miss so they get rebuilt
+        return None
+    return {
+        'tensor': tensor,
+        'laps': table.to_pandas(),
+        'drivers': meta['drivers'],
+        'channels': meta['channels'],
+        'grid': np.arange(tensor.shape[2]) * meta['step'],
+    }
+
+
+def get_lap_tensor(year, event, session_type):
+    """Stored lap tensor of a session, built from the shared session on first use."""
+    stored = load_tensor(year, event, session_type)
+    if stored is not None:
+        return stored
+    session = session_registry.get_session(year, event, session_type, needs=TENSOR_NEEDS)
+    return build_tensor(session, year, event, session_type)
+
+
+def channel(data, name, drivers=None):
+    """drivers x laps x grid view of one channel (optionally only some drivers, in that order)."""
+    values = data['tensor'][..., data['channels'].index(name)]
+    if drivers is not None:
+        values = values[[data['drivers'].index(d) for d in drivers]]
+    return values
+
+
+def aligned_laps(data, selection, channels=('Speed',), reference=0):
+    """
+    Stored laps in the shape telemetry_utils.align_laps returns, without resampling anything.
+
+    selection: (driver, lap number) of every lap to compare, e.g. each driver's fastest lap
+    Returns 'grid', 'Time', 'Delta' and one laps x grid array per channel, cut to the
+    distance every selected lap covers; None when a lap isn't in the tensor.
+    """
+    rows = []
+    for drv, lap_number in selection:
+        lap_index = int(lap_number) - 1
+        if drv not in data['drivers'] or not 0 <= lap_index < data['tensor'].shape[1]:
+            return None
+        rows.append((data['drivers'].index(drv), lap_index))
+    driver_index, lap_index = (list(axis) for axis in zip(*rows))
+    laps = np.asarray(data['tensor'][driver_index, lap_index], dtype=float)  # laps x grid x channels
+
+    time = laps[..., data['channels'].index('Time')]
+    # grid points every selected lap has data at (NaN past the end of a lap)
+    covered = ~np.isnan(time).any(axis=0)
+    if not covered.any():
+        return None
+    aligned = {name: laps[:, covered, data['channels'].index(name)]
+               for name in ['Time'] + [c for c in channels if c != 'Time' and c in data['channels']]}
+    aligned['grid'] = data['grid'][covered]
+    aligned['Delta'] = aligned['Time'] - aligned['Time'][reference]
+    return aligned
+
+
+def lap_means(data, name='Speed'):
+    """Average of a channel over each lap as a drivers x lap-number frame, e.g. to follow tyre wear."""
+    with warnings.catch_warnings():
+        # laps without data are all-NaN and simply stay NaN
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        means = np.nanmean(channel(data, name), axis=2)
+    return pd.DataFrame(means, index=data['drivers'], columns=np.arange(1, means.shape[1] + 1))
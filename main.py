@@ -3,43 +3,20 @@ import streamlit as st
 import fastf1
 import matplotlib.pyplot as plt
 import pandas as pd
-from concurrent.futures import ThreadPoolExecutor
 import time
 import threading
+import cache_manager
+import session_registry
+import warmup_scheduler
+import render_cache
+import stage_timer
+from fastf1_utils import preload_sessions
 
 # -------------------------------
 # Setup FastF1 cache safely
 # -------------------------------
-cache_dir = ".streamlit/cache"
-os.makedirs(cache_dir, exist_ok=True)  # Create folder if it doesn't exist
-fastf1.Cache.enable_cache(cache_dir)
-
-# -------------------------------
-# Function: preload sessions (runs once)
-# -------------------------------
-def preload_sessions(years, rounds):
-    """Preload FastF1 sessions in parallel to speed up first access."""
-    executor = ThreadPoolExecutor(max_workers=6)
-
-    def _load_session(year, rnd):
-        try:
-            sess = fastf1.get_session(year, rnd, 'Race')
-            sess.load()  # plain load, compatible with all versions
-            _ = sess.results  # only access results, avoid telemetry/laps
-            print(f"✅ Cached: {year} Round {rnd}")
-        except Exception as e:
-            print(f"❌ Error loading {year} Round {rnd}: {e}")
-
-    futures = []
-    for yr in years:
-        for rnd in rounds:
-            futures.append(executor.submit(_load_session, yr, rnd))
-    # wait for all tasks to complete (optional)
-    for f in futures:
-        try:
-            f.result(timeout=60)
-        except:
-            pass
+# same cache as every page, so the warmup below actually speeds up page loads
+cache_manager.enable_cache()
 
 # -------------------------------
 # Preload cache in background (runs once per session)
@@ -49,6 +26,7 @@ if "cache_preloaded" not in st.session_state:
 
     def background_warmup():
         time.sleep(2)  # slight delay so UI loads first
+        # shared scheduler: warmup jobs pause whenever a user is loading a session
         preload_sessions([2021, 2022, 2023, 2024, 2026], range(1, 6))  # adjust years/rounds as needed
         print("✅ FastF1 cache warmup complete")
 
@@ -83,3 +61,32 @@ This app uses data from **FastF1** to help analyze race telemetry, compare drive
 ---
 To get started, click on **"Telemetry Visualizer"** in the left sidebar.
 """)
+
+# -------------------------------
+# Cache status
+# -------------------------------
+with st.sidebar.expander("Cache status"):
+    stats = cache_manager.cache_stats()
+    st.write(f"Disk: {stats['disk_mb']:.0f} / {stats['budget_mb']:.0f} MB")
+    st.write(f"Hits: {stats['hits']} · Misses: {stats['misses']} ({stats['hit_rate']:.0%} hit rate)")
+    st.write(f"Evicted sessions: {stats['evicted_sessions']}")
+    registry = session_registry.registry_stats()
+    st.write(f"Sessions in memory: {len(registry['sessions'])} "
+             f"({registry['total_mb']:.0f} / {registry['budget_mb']:.0f} MB)")
+    warmup = warmup_scheduler.stats()["classes"]["warmup"]
+    st.write(f"Warmup queue: {warmup['queued']} queued · {warmup['completed']} done · "
+             f"avg wait {warmup['avg_wait_s']:.1f}s")
+    renders = render_cache.render_stats()
+    st.write(f"Rendered charts: {renders['images']} ({renders['size_mb']:.1f} MB) · "
+             f"{renders['hits']} hits · {renders['misses']} renders")
+
+with st.sidebar.expander("Stage timings"):
+    # measured by stage_timer in this process; every span is also logged to its metrics file
+    timings = stage_timer.stats()
+    if not timings:
+        st.write("Nothing measured yet.")
+    for stage, t in timings.items():
+        p50 = f"{t['p50_s']:.2f}s" if t['p50_s'] is not None else "-"
+        p95 = f"{t['p95_s']:.2f}s" if t['p95_s'] is not None else "-"
+        st.write(f"{stage}: {t['count']} runs · p50 {p50} · p95 {p95}"
+                 + (f" · {t['errors']} failed" if t['errors'] else ""))
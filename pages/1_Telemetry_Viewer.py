@@ -1,79 +1,86 @@
 import fastf1
+import os
 import streamlit as st
 import fastf1
-from fastf1.utils import delta_time
-import matplotlib.pyplot as plt
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
+import numpy as np
 import pandas as pd
+import telemetry_store
+import cache_manager
+import session_registry
+import event_catalog
+import telemetry_utils
+import plot_utils
+import render_cache
+import telemetry_export
+import lap_tensor
+import stage_timer
 
-# Enable FastF1 cache
-# fastf1.Cache.enable_cache('fastf1cache')
-
-#redoing this
-# fastf1.Cache.enable_cache(".streamlit/cache")
-
-fastf1.Cache.enable_cache('fastf1cache')
+# Enable the shared FastF1 cache
+cache_manager.enable_cache()
 
 
 
 # Page title
 st.title("F1 Telemetry Dashboard")
 
+# --- Data needs ---
+# the sidebar only needs results; laps + telemetry are loaded when the store misses
+PAGE_NEEDS = {session_registry.RESULTS}
+
+# Drivers extracted at the same time; the session itself is loaded once (single-flight)
+TELEMETRY_WORKERS = int(os.environ.get("F1_TELEMETRY_WORKERS", "4"))
+
 # --- Helper Functions ---
-@st.cache_resource(show_spinner=False)
-def load_session(year, gp, session_type):
-    session = fastf1.get_session(year, gp, session_type)
-    session.load()
-    return session
-
-def get_driver_telemetry(_session, driver_code: str):
-    # do not cache this function because it accepts complex session objects
-    try:
-        lap = _session.laps.pick_driver(driver_code).pick_fastest()
-        telemetry = lap.get_telemetry()
-        return lap, telemetry
-    except Exception as e:
-        raise RuntimeError(f"No telemetry for {driver_code}: {e}")
-
-def smooth_telemetry(telemetry: pd.DataFrame, window: int = 5) -> pd.DataFrame:
-    return telemetry.rolling(window=window, min_periods=1).mean()
-
-# --- Dark theme for matplotlib ---
-DARK_BG = "#0E1117"
-TEXT_COLOR = "#E6E6E6"
-GRID_COLOR = "#2F343A"
-
-plt.style.use("dark_background")
-plt.rcParams.update({
-    "figure.facecolor": DARK_BG,
-    "axes.facecolor": DARK_BG,
-    "savefig.facecolor": DARK_BG,
-    "axes.edgecolor": TEXT_COLOR,
-    "axes.labelcolor": TEXT_COLOR,
-    "text.color": TEXT_COLOR,
-    "xtick.color": TEXT_COLOR,
-    "ytick.color": TEXT_COLOR,
-    "grid.color": GRID_COLOR,
-    "legend.edgecolor": TEXT_COLOR,
-    "legend.facecolor": DARK_BG,
-    "axes.titlecolor": TEXT_COLOR,
-    "figure.edgecolor": DARK_BG,
-})
-
-def dark_fig(figsize=(8,4)):
-    fig, ax = plt.subplots(figsize=figsize)
-    fig.patch.set_facecolor(DARK_BG)
-    ax.set_facecolor(DARK_BG)
-    return fig, ax
+def load_session(year, gp, session_type, needs=PAGE_NEEDS):
+    # one shared, memory-bounded copy per session for the whole server
+    return session_registry.get_session(year, gp, session_type, needs=needs)
+
+def get_driver_telemetry(driver_code: str, year, gp, session_type):
+    # fastest laps are kept in the on-disk telemetry store, so repeats are a file read
+    return telemetry_store.fastest_lap_telemetry(year, gp, session_type, driver_code)
+
+def iter_driver_telemetry(drivers, year, gp, session_type, workers=TELEMETRY_WORKERS):
+    """
+    Runs get_driver_telemetry for every driver on a bounded thread pool and yields
+    (driver, (lap, telemetry), error) in completion order, so the page can show each
+    driver as soon as it's ready. Only this (script) thread touches Streamlit.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(drivers)))) as pool:
+        futures = {pool.submit(get_driver_telemetry, drv, year, gp, session_type): drv for drv in drivers}
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result(), None
+            except Exception as e:
+                yield futures[future], None, e
+
+def smooth_telemetry(telemetry: pd.DataFrame, window_m: float = telemetry_utils.SMOOTHING_WINDOW_M) -> pd.DataFrame:
+    # only Speed / Throttle / RPM are averaged (over metres, not samples); gear, DRS, times stay as recorded
+    with stage_timer.span("smoothing", rows=len(telemetry), window_m=window_m):
+        return telemetry_utils.smooth_channels(telemetry, window_m)
+
+# --- Charts ---
+plot_utils.apply_dark_theme()
+
+def render_lines(chart_type, lines, figsize, title, **kwargs):
+    """PNG of a line chart; identical charts (same data, labels, size, theme) are served from the render cache."""
+    lines = [(label, np.asarray(x), np.asarray(y), color) for label, x, y, color in lines]
+    params = {"lines": [(label, color) for label, _, _, color in lines],
+              "figsize": figsize, "title": title, **kwargs}
+    return render_cache.render(chart_type, [(x, y) for _, x, y, _ in lines], params,
+                               lambda: plot_utils.line_chart(lines, figsize, title, **kwargs))
 
 # --- Sidebar ---
 st.sidebar.header("Session Selection")
-year = st.sidebar.selectbox("Select Year", list(range(2022, 2026)))
-gp = st.sidebar.selectbox("Select Grand Prix", [
-    'Australian Grand Prix', 'Chinese Grand Prix', 'Japanese Grand Prix', 'Bahrain Grand Prix',
-    'Saudi Arabian Grand Prix', 'Miami Grand Prix', 'British Grand Prix', 'Monaco Grand Prix', 'Italian Grand Prix',
-    'Singapore Grand Prix'
-])
-session_type = st.sidebar.selectbox("Select Session", ['Q', 'R', 'S'])  # Qualifying, Race, Sprint
+# seasons, events and sessions come from the shared (cached) event catalog
+year = st.sidebar.selectbox("Select Year", event_catalog.seasons(2022))
+gp_options = event_catalog.event_names(year, past_only=True)
+if not gp_options:
+    st.error(f"No event schedule available for {year}.")
+    st.stop()
+gp = st.sidebar.selectbox("Select Grand Prix", gp_options)
+session_type = st.sidebar.selectbox("Select Session", event_catalog.available_sessions(year, gp))  # Qualifying, Race, Sprint
 
 session = load_session(year, gp, session_type)
 
@@ -86,12 +93,9 @@ display_to_code = dict(zip(drivers_df['Display'], drivers_df['Abbreviation']))
 driver_list = sorted(display_to_code.keys())
 
 st.sidebar.header("Driver Selection")
-driver1 = st.sidebar.selectbox("Select Driver 1", driver_list)
-driver2 = st.sidebar.selectbox("Select Driver 2 (optional)", ['None'] + driver_list)
-
-# Look up actual driver codes
-driver1 = display_to_code[driver1]
-driver2 = display_to_code[driver2] if driver2 != 'None' else 'None'
+# any number of drivers; the first one selected is the reference for lap deltas
+selected_display = st.sidebar.multiselect("Select Drivers", driver_list, default=driver_list[:1])
+drivers = [display_to_code[d] for d in selected_display]
 
 telemetry_option = st.sidebar.selectbox(
     "Select Telemetry Type",
@@ -100,161 +104,155 @@ telemetry_option = st.sidebar.selectbox(
 
 # trying to make things cleaner
 apply_smoothing = st.sidebar.checkbox("Apply Smoothing", value=False)
+smoothing_window = st.sidebar.slider("Smoothing window (m)", 10, 200, int(telemetry_utils.SMOOTHING_WINDOW_M), step=10,
+                                     disabled=not apply_smoothing)
+
+export_format = st.sidebar.selectbox("Export format", list(telemetry_export.FORMATS))
 
 # --- Progress area on the page (will be updated when user hits Load) ---
 progress_area = st.container()
 
 load_btn = st.sidebar.button("Load Telemetry")
 
+def lap_summary(lap):
+    return {
+        "Lap Time": str(lap['LapTime']),
+        "Sector 1": str(lap['Sector1Time']),
+        "Sector 2": str(lap['Sector2Time']),
+        "Sector 3": str(lap['Sector3Time']),
+        "Compound": lap.get('Compound', None)
+    }
+
 # --- Main Content ---
-if load_btn and driver1:
+if load_btn and drivers:
     # initialize progress UI inside the page container
     progress_bar = progress_area.progress(0)
     status_text = progress_area.empty()
     percent_text = progress_area.empty()
 
-    def set_progress(pct: int, status: str):
+    def set_progress(pct: int, status: str, eta_s=None):
         pct = max(0, min(100, int(pct)))
         progress_bar.progress(pct)
         status_text.markdown(f"**Status:** {status}")
-        # show as "[xx/100] - xx%"
-        percent_text.markdown(f"**Loaded:** [{pct}/100] - {pct}%")
-
-    set_progress(3, "Starting telemetry load...")
+        # show as "[xx/100] - xx%", plus the estimated time left
+        percent_text.markdown(stage_timer.progress_text(pct, eta_s))
+
+    # progress is weighted by how long each stage took on earlier loads (stage_timer), not fixed steps:
+    # stored laps are a file read, the others need the session; drivers load TELEMETRY_WORKERS at a time
+    n = len(drivers)
+    extraction_s = sum(stage_timer.estimate(
+        "telemetry_extraction",
+        "store" if os.path.isfile(telemetry_store.telemetry_path(year, gp, session_type, drv)) else "session")
+        for drv in drivers)
+    charts = 2 * n + (2 if n > 1 else 0)
+    progress = stage_timer.Progress([
+        ("telemetry", n, extraction_s / max(1, min(TELEMETRY_WORKERS, n))),
+        ("smoothing", n if apply_smoothing else 0, n * stage_timer.estimate("smoothing")),
+        # planned as drawn: the stage average mixes in near-free render-cache hits
+        ("render", charts, charts * stage_timer.estimate("render", "drawn")),
+    ], set_progress)
+    progress.update("Starting telemetry load...")
+    colors = dict(zip(drivers, plot_utils.line_colors(len(drivers))))
 
     with st.spinner("Loading telemetry data..."):
         try:
-            # load driver1 telemetry
-            set_progress(15, f"Loading telemetry for {driver1} (driver 1)...")
-            lap1, telemetry1 = get_driver_telemetry(session, driver1)
+            # 1) Individual plots, two per row, filled in as each driver's telemetry arrives
+            st.subheader(f"Fastest laps - {telemetry_option}")
+            grid = st.columns(2)
+            slots = {drv: grid[i % 2].container() for i, drv in enumerate(drivers)}
+            pending = {drv: slot.empty() for drv, slot in slots.items()}
+            for drv, placeholder in pending.items():
+                placeholder.caption(f"⏳ Loading {drv}...")
+
+            laps, telemetries = {}, {}
+            for done, (drv, result, error) in enumerate(
+                    iter_driver_telemetry(drivers, year, gp, session_type), start=1):
+                progress.advance("telemetry", f"Loaded {done}/{n} drivers ({drv})")
+                pending[drv].empty()
+                with slots[drv]:
+                    if error is not None:
+                        st.error(f"Could not load telemetry for {drv}: {error}")
+                        continue
+                    lap, telemetry = result
+                    # Apply smoothing before plotting if requested
+                    if apply_smoothing:
+                        telemetry = smooth_telemetry(telemetry, smoothing_window)
+                        progress.advance("smoothing", f"Smoothed {drv}")
+                    laps[drv], telemetries[drv] = lap, telemetry
+
+                    st.markdown(f"**{drv} - {telemetry_option}**")
+                    if telemetry_option in telemetry.columns:
+                        plot = telemetry_utils.downsample(telemetry, [telemetry_option], (6, 3))
+                        st.image(render_lines("telemetry", [(drv, plot['Distance'], plot[telemetry_option], colors[drv])], (6, 3),
+                                              f'{drv} {telemetry_option} - {gp} {year}',
+                                              xlabel='Distance (m)', ylabel=telemetry_option))
+                    else:
+                        st.warning(f"Telemetry field '{telemetry_option}' not available for {drv}.")
+                    progress.advance("render", f"Rendered {drv} {telemetry_option}")
+
+                    track = telemetry_utils.downsample(telemetry, ['X', 'Y'], (6, 3))
+                    st.image(render_lines("track_map", [(drv, track['X'], track['Y'], colors[drv])], (6, 3),
+                                          f'{drv} Track Map - {gp} {year}', legend=False, equal=True))
+                    progress.advance("render", f"Rendered {drv} track map")
+
+            loaded = [drv for drv in drivers if drv in telemetries]
+            if not loaded:
+                raise RuntimeError("no telemetry could be loaded")
+
+            # 2) Comparison and delta plots (full width) - only with two or more drivers
+            if len(loaded) > 1:
+                progress.update("Rendering comparison plots...")
+                reference = loaded[0]
+                st.subheader(f"Comparison: {', '.join(loaded)} - {telemetry_option}")
+                lines = []
+                # downsample to the figure width, keeping per-bucket minima/maxima (braking points, peaks)
+                for drv in loaded:
+                    if telemetry_option in telemetries[drv].columns:
+                        plot = telemetry_utils.downsample(telemetries[drv], [telemetry_option], (10, 4))
+                        lines.append((drv, plot['Distance'], plot[telemetry_option], colors[drv]))
+
+                if lines:
+                    st.image(render_lines("telemetry_compare", lines, (10, 4),
+                                          f'{" vs ".join(loaded)} - {telemetry_option} - {gp} {year}',
+                                          xlabel='Distance (m)', ylabel=telemetry_option))
+                else:
+                    st.warning(f"Telemetry field '{telemetry_option}' not available for comparison.")
+                progress.advance("render", "Rendering lap delta...")
 
-            # Optional driver2
-            has_driver2 = driver2 != 'None'
-            if has_driver2:
+                # time gained / lost along the lap, all laps aligned on one distance grid: sliced
+                # from the session's lap tensor when one is stored (export_seasons --tensors)
                 try:
-                    set_progress(40, f"Loading telemetry for {driver2} (driver 2)...")
-                    lap2, telemetry2 = get_driver_telemetry(session, driver2)
+                    stored = lap_tensor.load_tensor(year, gp, session_type)
+                    aligned = None
+                    if stored is not None:
+                        aligned = lap_tensor.aligned_laps(stored, [(drv, laps[drv]['LapNumber']) for drv in loaded])
+                    if aligned is None:
+                        aligned = telemetry_utils.align_laps([telemetries[drv] for drv in loaded])
+                    st.image(render_lines("delta", [(drv, aligned['grid'], aligned['Delta'][i], colors[drv])
+                                                    for i, drv in enumerate(loaded) if i > 0], (10, 3),
+                                          f'Delta to {reference} - {gp} {year}',
+                                          xlabel='Distance (m)', ylabel='Delta (s)'))
                 except Exception as e:
-                    has_driver2 = False
-                    telemetry2 = None
-                    lap2 = None
-                    st.error(f"Could not load telemetry for {driver2}: {e}")
-                    set_progress(45, f"Failed loading telemetry for {driver2}")
-
-            # Apply smoothing before plotting if requested
-            if apply_smoothing:
-                set_progress(60, "Applying smoothing to telemetry...")
-                telemetry1 = smooth_telemetry(telemetry1)
-                if has_driver2:
-                    telemetry2 = smooth_telemetry(telemetry2)
-                set_progress(70, "Smoothing complete")
+                    st.warning(f"Could not compute the lap delta: {e}")
+                progress.advance("render", "Rendered comparison plots")
             else:
-                set_progress(55, "Smoothing skipped")
-
-            # 1) Comparison plot (full width) - only if we have a second driver
-            if has_driver2:
-                set_progress(75, "Rendering comparison plot...")
-                st.subheader(f"Comparison: {driver1} vs {driver2} - {telemetry_option}")
-                fig_compare, ax_compare = dark_fig(figsize=(10, 4))
-                plotted = False
-                if telemetry_option in telemetry1.columns:
-                    ax_compare.plot(telemetry1['Distance'], telemetry1[telemetry_option], label=driver1, color='tab:blue')
-                    plotted = True
-                if telemetry_option in telemetry2.columns:
-                    ax_compare.plot(telemetry2['Distance'], telemetry2[telemetry_option], label=driver2, color='tab:red')
-                    plotted = True
-
-                if plotted:
-                    ax_compare.set_xlabel('Distance (m)')
-                    ax_compare.set_ylabel(telemetry_option)
-                    ax_compare.set_title(f'{driver1} vs {driver2} - {telemetry_option} - {gp} {year}')
-                    ax_compare.legend()
-                    st.pyplot(fig_compare)
-                else:
-                    st.warning(f"Telemetry field '{telemetry_option}' not available for comparison.")
-
-            # 2) Individual plots side-by-side
-            set_progress(85, "Rendering individual plots...")
-            cols = st.columns(2)
-            # Driver 1 column
-            with cols[0]:
-                st.subheader(f"{driver1} - {telemetry_option}")
-                fig1, ax1 = dark_fig(figsize=(6, 3))
-                if telemetry_option in telemetry1.columns:
-                    ax1.plot(telemetry1['Distance'], telemetry1[telemetry_option], label=driver1, color='tab:blue')
-                    ax1.set_xlabel('Distance (m)')
-                    ax1.set_ylabel(telemetry_option)
-                    ax1.set_title(f'{driver1} {telemetry_option} - {gp} {year}')
-                    ax1.legend()
-                    st.pyplot(fig1)
-                else:
-                    st.warning(f"Telemetry field '{telemetry_option}' not available for {driver1}.")
-
-                st.subheader(f"{driver1} - Track Map")
-                fig_map1, ax_map1 = dark_fig(figsize=(6, 3))
-                ax_map1.plot(telemetry1['X'], telemetry1['Y'], label=driver1, color='tab:blue')
-                ax_map1.set_title(f'{driver1} Track Map - {gp} {year}')
-                ax_map1.axis('equal')
-                st.pyplot(fig_map1)
-
-                st.write({
-                    "Lap Time": str(lap1['LapTime']),
-                    "Sector 1": str(lap1['Sector1Time']),
-                    "Sector 2": str(lap1['Sector2Time']),
-                    "Sector 3": str(lap1['Sector3Time']),
-                    "Compound": lap1.get('Compound', None)
-                })
-
-            # Driver 2 column (if present)
-            with cols[1]:
-                if has_driver2:
-                    st.subheader(f"{driver2} - {telemetry_option}")
-                    fig2, ax2 = dark_fig(figsize=(6, 3))
-                    if telemetry_option in telemetry2.columns:
-                        ax2.plot(telemetry2['Distance'], telemetry2[telemetry_option], label=driver2, color='tab:red')
-                        ax2.set_xlabel('Distance (m)')
-                        ax2.set_ylabel(telemetry_option)
-                        ax2.set_title(f'{driver2} {telemetry_option} - {gp} {year}')
-                        ax2.legend()
-                        st.pyplot(fig2)
-                    else:
-                        st.warning(f"Telemetry field '{telemetry_option}' not available for {driver2}.")
-
-                    st.subheader(f"{driver2} - Track Map")
-                    fig_map2, ax_map2 = dark_fig(figsize=(6, 3))
-                    ax_map2.plot(telemetry2['X'], telemetry2['Y'], label=driver2, color='tab:red')
-                    ax_map2.set_title(f'{driver2} Track Map - {gp} {year}')
-                    ax_map2.axis('equal')
-                    st.pyplot(fig_map2)
-
-                    st.write({
-                        driver1: {
-                            "Lap Time": str(lap1['LapTime']),
-                            "Sector 1": str(lap1['Sector1Time']),
-                            "Sector 2": str(lap1['Sector2Time']),
-                            "Sector 3": str(lap1['Sector3Time']),
-                            "Compound": lap1.get('Compound', None)
-                        },
-                        driver2: {
-                            "Lap Time": str(lap2['LapTime']),
-                            "Sector 1": str(lap2['Sector1Time']),
-                            "Sector 2": str(lap2['Sector2Time']),
-                            "Sector 3": str(lap2['Sector3Time']),
-                            "Compound": lap2.get('Compound', None)
-                        }
-                    })
-                else:
-                    st.info("No second driver selected — select a second driver to show a side-by-side comparison column.")
-
-            # Download CSVs (kept below so UI remains clean)
-            set_progress(95, "Preparing downloads...")
-            csv1 = telemetry1.to_csv(index=False)
-            st.download_button(f"Download {driver1} Telemetry CSV", csv1, f"{driver1}_telemetry.csv", "text/csv")
-            if has_driver2:
-                csv2 = telemetry2.to_csv(index=False)
-                st.download_button(f"Download {driver2} Telemetry CSV", csv2, f"{driver2}_telemetry.csv", "text/csv")
-
-            set_progress(100, "Telemetry load complete")
+                st.info("Select two or more drivers to show comparison and delta plots.")
+
+            # 3) Lap summary of every loaded driver
+            st.subheader("Fastest lap summary")
+            st.dataframe(pd.DataFrame({drv: lap_summary(laps[drv]) for drv in loaded}).T, use_container_width=True)
+
+            # Downloads (kept below so UI remains clean); files are only serialized when a button is clicked
+            for drv in loaded:
+                st.download_button(
+                    f"Download {drv} Telemetry ({export_format})",
+                    data=partial(telemetry_export.export_bytes, telemetries[drv], export_format),
+                    file_name=telemetry_export.file_name(f"{drv}_telemetry", export_format),
+                    mime=telemetry_export.mime_type(export_format),
+                    key=f"download_{drv}",
+                )
+
+            progress.finish("Telemetry load complete")
             progress_area.success("✅ Load complete")
 
         except Exception as e:
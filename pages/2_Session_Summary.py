@@ -2,22 +2,29 @@ import fastf1
 import streamlit as st
 import fastf1
 import pandas as pd
+import cache_manager
+import session_registry
+import event_catalog
+import stage_timer
 
-fastf1.Cache.enable_cache('fastf1cache')
-# fastf1.Cache.enable_cache(".streamlit/cache")
+cache_manager.enable_cache()
 
 
 st.title("F1 Mini Race Summary")
 
+# this page only reads session.results
+PAGE_NEEDS = {session_registry.RESULTS}
+
 # --- Sidebar selections ---
-year = st.sidebar.selectbox("Select Year", list(range(2022, 2026)), key='year')
-gp = st.sidebar.selectbox("Select Grand Prix", [
-    'Australian Grand Prix', 'Chinese Grand Prix', 'Japanese Grand Prix', 'Bahrain Grand Prix', 
-    'Saudi Arabian Grand Prix', 'Miami Grand Prix', 'British Grand Prix', 'Monaco Grand Prix', 
-    'Italian Grand Prix', 'Singapore Grand Prix'
-], key='gp')
+# seasons, events and sessions come from the shared (cached) event catalog
+year = st.sidebar.selectbox("Select Year", event_catalog.seasons(2022), key='year')
+gp_options = event_catalog.event_names(year, past_only=True)
+if not gp_options:
+    st.error(f"No event schedule available for {year}.")
+    st.stop()
+gp = st.sidebar.selectbox("Select Grand Prix", gp_options, key='gp')
 
-session_type = st.sidebar.selectbox("Select Session", ['Q', 'R', 'S'], key='session_type')
+session_type = st.sidebar.selectbox("Select Session", event_catalog.available_sessions(year, gp), key='session_type')
 
 # --- Load button ---
 # on-page progress area (will show progress/percent/status when user clicks Load)
@@ -31,31 +38,31 @@ if st.sidebar.button("Load Session"):
     status_text = progress_area.empty()
     percent_text = progress_area.empty()
 
-    def set_progress(pct: int, status: str):
+    def set_progress(pct: int, status: str, eta_s=None):
         pct = max(0, min(100, int(pct)))
         progress_bar.progress(pct)
         status_text.markdown(f"**Status:** {status}")
-        percent_text.markdown(f"**Loaded:** [{pct}/100] - {pct}%")
-
-    set_progress(3, "Starting session load...")
+        percent_text.markdown(stage_timer.progress_text(pct, eta_s))
 
     with st.spinner("Loading session..."):
         try:
-            set_progress(20, "Requesting session from FastF1...")
             # read values from session_state (sidebar selects store into session_state via keys)
             year_val = st.session_state.get('year', year)
             gp_val = st.session_state.get('gp', gp)
             session_type_val = st.session_state.get('session_type', session_type)
 
-            session = fastf1.get_session(year_val, gp_val, session_type_val)
-
-            set_progress(60, "Loading session data (this can take a moment)...")
-            session.load()
+            # a single blocking step: instead of made-up percentages, the time left is how long
+            # results loads usually take here (running average of earlier loads)
+            expected_s = stage_timer.estimate("session_load", session_registry.RESULTS)
+            progress = stage_timer.Progress([("session", 1, expected_s)], set_progress)
+            progress.update("Loading session results...")
+            session_registry.get_session(year_val, gp_val, session_type_val, needs=PAGE_NEEDS)
 
-            st.session_state['session'] = session
+            # keep only the key per browser tab; the session itself lives in the shared registry
+            st.session_state['session_key'] = (year_val, gp_val, session_type_val)
             st.session_state['session_loaded'] = True
 
-            set_progress(100, "Session loaded")
+            progress.finish("Session loaded")
             progress_area.success("Session loaded!")
         except Exception as e:
             set_progress(100, "Failed")
@@ -64,7 +71,7 @@ if st.sidebar.button("Load Session"):
 
 # --- If session is loaded, continue ---
 if st.session_state.get('session_loaded', False):
-    session = st.session_state['session']
+    session = session_registry.get_session(*st.session_state['session_key'], needs=PAGE_NEEDS)
     results = session.results
 
     # Only use finishing Position (remove GridPosition as it's redundant here)
@@ -2,21 +2,28 @@ import fastf1
 import streamlit as st
 import pandas as pd
 import fastf1
-import threading
-import time
+import standings_store
+import standings_engine
+import plot_utils
+import render_cache
+import numpy as np
+import cache_manager
+import warmup_scheduler
+import event_catalog
+
+plot_utils.apply_dark_theme()
 
 # ---------------------------
-# ⚡ Enable lightweight FastF1 cache
+# ⚡ Enable shared FastF1 cache
 # ---------------------------
-# fastf1.Cache.enable_cache(".streamlit/cache")
-fastf1.Cache.enable_cache('fastf1cache')
+cache_manager.enable_cache()
 
 
 st.set_page_config(page_title="Championship Standings", layout="wide")
 st.title("🏆 Championship Standings Visualizer")
 
 # Sidebar: Season selector
-year = st.sidebar.selectbox("Select Season", list(range(2021, 2026)), index=3)
+year = st.sidebar.selectbox("Select Season", event_catalog.seasons(2021), index=3)
 
 # Sidebar: View option
 view_option = st.sidebar.radio(
@@ -34,6 +41,9 @@ load_clicked = st.sidebar.button("Load Standings")
 if "standings_loaded" not in st.session_state:
     st.session_state.standings_loaded = False
     st.session_state.loaded_year = None
+    st.session_state.points_ledger = None
+    st.session_state.season_results = None
+    st.session_state.progression = None
     st.session_state.driver_standings_df = None
     st.session_state.constructor_standings_df = None
 
@@ -45,96 +55,100 @@ if st.session_state.loaded_year != year:
 # 🏎️ Load Standings Function
 # ---------------------------
 def load_standings_for_year(year):
-    driver_points = {}
-    constructor_points = {}
-
-    schedule = fastf1.get_event_schedule(year, include_testing=False)
-    rounds = sorted(schedule["RoundNumber"].unique())
-
-    for rnd in rounds:
-        try:
-            session = fastf1.get_session(year, rnd, "R")
-            # ⚡ load only results — skip telemetry/laps/weather
-            # session.load(results=True, telemetry=False, laps=False, weather=False)
-            session.load()
-            results = session.results
-
-            for _, row in results.iterrows():
-                drv = row.get("Abbreviation") or row.get("Driver")
-                team = row.get("TeamName") or row.get("Constructor")
-                pts = row.get("Points", 0) or 0
-
-                if drv:
-                    driver_points[drv] = driver_points.get(drv, 0) + float(pts)
-                if team:
-                    constructor_points[team] = constructor_points.get(team, 0) + float(pts)
-
-        except Exception as e:
-            st.warning(f"⚠️ Could not load round {rnd}: {e}")
-
-    driver_standings = pd.DataFrame({
-        "Driver": list(driver_points.keys()),
-        "Points": list(driver_points.values())
-    }).sort_values(by="Points", ascending=False).reset_index(drop=True)
-
-    constructor_standings = pd.DataFrame({
-        "Constructor": list(constructor_points.keys()),
-        "Points": list(constructor_points.values())
-    }).sort_values(by="Points", ascending=False).reset_index(drop=True)
-
-    return driver_standings, constructor_standings
+    # persisted snapshots are read directly; the ledger only fetches rounds newer than stored
+    return standings_store.refresh_snapshots(
+        year, on_error=lambda rnd, e: st.warning(f"⚠️ Could not load round {rnd}: {e}")
+    )
 
 # ---------------------------
-# 🚀 Background Cache Warmup (runs ONCE)
+# 🚀 Background Cache Warmup (runs ONCE per server process)
 # ---------------------------
-if "cache_warmup_started" not in st.session_state:
-    st.session_state.cache_warmup_started = True
-
-    def warmup_delayed():
-        time.sleep(3)  # let UI load first
-        for yr in range(2021, 2025):
-            try:
-                load_standings_for_year(yr)
-                print(f"✅ Cached {yr} standings.")
-            except Exception as e:
-                print(f"Warmup error for {yr}: {e}")
-
-    threading.Thread(target=warmup_delayed, daemon=True).start()
+standings_store.warmup_snapshots_once(range(2021, 2025))
 
 # ---------------------------
 # 🧩 Load + Display Logic
 # ---------------------------
 if load_clicked:
-    with st.spinner("Loading standings... this may take a while ⏳"):
-        ddf, cdf = load_standings_for_year(year)
-        st.session_state.driver_standings_df = ddf
-        st.session_state.constructor_standings_df = cdf
-        st.session_state.standings_loaded = True
-        st.session_state.loaded_year = year
+    with st.spinner("Loading standings... this may take a while ⏳"), warmup_scheduler.interactive():
+        try:
+            ddf, cdf, results, ledger = load_standings_for_year(year)
+        except Exception as e:
+            st.error(f"❌ Failed to load {year} standings: {e}")
+        else:
+            st.session_state.driver_standings_df = ddf
+            st.session_state.constructor_standings_df = cdf
+            st.session_state.season_results = results
+            st.session_state.points_ledger = ledger
+            # rounds x names matrices, built once per load; the charts below only slice them
+            st.session_state.progression = {
+                "Drivers": standings_engine.season_progression(ledger, "Driver"),
+                "Constructors": standings_engine.season_progression(ledger, "Constructor"),
+            }
+            st.session_state.standings_loaded = True
+            st.session_state.loaded_year = year
 
 if st.session_state.standings_loaded and st.session_state.loaded_year == year:
+    results = st.session_state.season_results
     driver_standings = st.session_state.driver_standings_df
     constructor_standings = st.session_state.constructor_standings_df
 
+    # standings "as of round N" come straight from the stored results, no extra loading
+    loaded_rounds = sorted(results["Round"].unique()) if not results.empty else []
+    as_of_round = loaded_rounds[-1] if loaded_rounds else None
+    if len(loaded_rounds) > 1:
+        as_of_round = st.sidebar.select_slider(
+            "Standings after round", options=loaded_rounds, value=loaded_rounds[-1]
+        )
+        if as_of_round != loaded_rounds[-1]:
+            driver_standings, constructor_standings = standings_engine.season_standings(results, as_of_round)
+
+    metric_cols = ["Points", "Wins", "Podiums", "DNFs", "PointsPerRound"]
+
     if view_option in ["Driver Standings", "Both"]:
         st.subheader(f"🏁 Driver Standings {year}")
         if driver_standings is not None and not driver_standings.empty:
-            driver_standings["Points"] = pd.to_numeric(driver_standings["Points"], errors="coerce").fillna(0)
-            driver_standings = driver_standings.sort_values(by="Points", ascending=False).reset_index(drop=True)
+            driver_standings = driver_standings.reset_index(drop=True)
             driver_standings["Position"] = driver_standings.index + 1
-            st.dataframe(driver_standings[["Position", "Driver", "Points"]], use_container_width=True)
+            st.dataframe(driver_standings[["Position", "Driver"] + metric_cols], use_container_width=True)
         else:
             st.warning("No driver standings available for this season.")
 
     if view_option in ["Constructor Standings", "Both"]:
         st.subheader(f"🏗️ Constructor Standings {year}")
         if constructor_standings is not None and not constructor_standings.empty:
-            constructor_standings["Points"] = pd.to_numeric(constructor_standings["Points"], errors="coerce").fillna(0)
-            constructor_standings = constructor_standings.sort_values(by="Points", ascending=False).reset_index(drop=True)
+            constructor_standings = constructor_standings.reset_index(drop=True)
             constructor_standings["Position"] = constructor_standings.index + 1
-            st.dataframe(constructor_standings[["Position", "Constructor", "Points"]], use_container_width=True)
+            st.dataframe(constructor_standings[["Position", "Constructor"] + metric_cols], use_container_width=True)
         else:
             st.warning("No constructor standings available for this season.")
+
+    # ---------------------------
+    # 📈 Season progression (bump chart + gap to leader)
+    # ---------------------------
+    progression_view = st.radio("Progression", ["Drivers", "Constructors"], horizontal=True)
+    progression = st.session_state.progression[progression_view]
+    rounds = progression["rounds"]
+    if len(rounds) > 1:
+        # pure array slicing on the cached matrices: rounds up to the slider, selected names
+        upto = int(np.searchsorted(rounds, as_of_round, side="right"))
+        final_order = np.argsort(progression["positions"][upto - 1])
+        names = progression["names"]
+        selected = st.multiselect(
+            f"{progression_view} to plot", list(names), default=list(names[final_order[:10]])
+        )
+        cols = np.flatnonzero(np.isin(names, selected))
+        if cols.size:
+            label = progression_view[:-1]
+            bump_args = (rounds[:upto], names[cols], progression["positions"][:upto, cols],
+                         f"{label} championship positions {year}")
+            st.image(render_cache.render("bump", bump_args, {}, lambda: plot_utils.bump_chart(*bump_args)))
+
+            # gap is measured against the leader of the whole field, not just the selection
+            gap_args = (rounds[:upto], names[cols], progression["gap"][:upto, cols],
+                        f"Points behind the {label.lower()} leader {year}")
+            st.image(render_cache.render("points_gap", gap_args, {}, lambda: plot_utils.gap_chart(*gap_args)))
+    else:
+        st.caption("Season progression charts appear once more than one round is loaded.")
 else:
     st.info("Click **'Load Standings'** in the sidebar to fetch and display season standings.")
 
@@ -1,14 +1,20 @@
 import fastf1
 import streamlit as st
 import pandas as pd
+import cache_manager
+import session_registry
+import event_catalog
 
 st.set_page_config(page_title="Driver Profiles", layout="wide")
 st.title("Driver Profiles")
 
-fastf1.Cache.enable_cache("fastf1cache")
+cache_manager.enable_cache()
+
+# driver and team info comes from session.results only
+PAGE_NEEDS = {session_registry.RESULTS}
 
 # --- Sidebar controls ---
-year_options = list(range(2018, 2026))
+year_options = event_catalog.seasons(2018)
 selected_year = st.sidebar.selectbox("Select Season", year_options, index=year_options.index(2024))
 load_profiles = st.sidebar.button("Load Profiles")
 
@@ -28,11 +34,9 @@ if load_profiles:
         try:
             # Try Bahrain first, fallback to Melbourne
             try:
-                session = fastf1.get_session(selected_year, "Bahrain", "R")
-                session.load()
+                session = session_registry.get_session(selected_year, "Bahrain", "R", needs=PAGE_NEEDS)
             except Exception:
-                session = fastf1.get_session(selected_year, "Melbourne", "R")
-                session.load()
+                session = session_registry.get_session(selected_year, "Melbourne", "R", needs=PAGE_NEEDS)
 
             drivers = session.drivers
             teams = set()
@@ -0,0 +1,129 @@
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.collections import PolyCollection
+from matplotlib.patches import Patch
+from matplotlib.ticker import MaxNLocator
+
+# --- Dark theme for matplotlib (matches the Streamlit dark theme) ---
+DARK_BG = "#0E1117"
+TEXT_COLOR = "#E6E6E6"
+GRID_COLOR = "#2F343A"
+# part of every render cache key, so a theme change never serves stale images
+THEME_KEY = ("dark", DARK_BG, TEXT_COLOR, GRID_COLOR)
+
+# Resolution every chart is rasterized at (render cache)
+RENDER_DPI = 200
+
+
+def apply_dark_theme():
+    plt.style.use("dark_background")
+    plt.rcParams.update({
+        "figure.facecolor": DARK_BG,
+        "axes.facecolor": DARK_BG,
+        "savefig.facecolor": DARK_BG,
+        "axes.edgecolor": TEXT_COLOR,
+        "axes.labelcolor": TEXT_COLOR,
+        "text.color": TEXT_COLOR,
+        "xtick.color": TEXT_COLOR,
+        "ytick.color": TEXT_COLOR,
+        "grid.color": GRID_COLOR,
+        "legend.edgecolor": TEXT_COLOR,
+        "legend.facecolor": DARK_BG,
+        "axes.titlecolor": TEXT_COLOR,
+        "figure.edgecolor": DARK_BG,
+    })
+
+
+def dark_fig(figsize=(8, 4)):
+    fig, ax = plt.subplots(figsize=figsize)
+    fig.patch.set_facecolor(DARK_BG)
+    ax.set_facecolor(DARK_BG)
+    return fig, ax
+
+
+def line_colors(n):
+    # tab10 for small fields, tab20 once lines would start repeating colours
+    cmap = plt.get_cmap("tab10" if n <= 10 else "tab20")
+    return [cmap(i % cmap.N) for i in range(n)]
+
+
+def line_chart(lines, figsize, title, xlabel=None, ylabel=None, legend=True, equal=False):
+    """Plain line plot; lines is a list of (label, x, y, color)."""
+    fig, ax = dark_fig(figsize=figsize)
+    for label, x, y, color in lines:
+        ax.plot(x, y, label=label, color=color)
+    if xlabel:
+        ax.set_xlabel(xlabel)
+    if ylabel:
+        ax.set_ylabel(ylabel)
+    if equal:
+        ax.axis("equal")
+    ax.set_title(title)
+    if legend:
+        ax.legend()
+    return fig
+
+
+def bump_chart(rounds, names, positions, title):
+    """Championship position after each round, one line per name (leader on top)."""
+    fig, ax = dark_fig(figsize=(10, 5))
+    for color, name, column in zip(line_colors(len(names)), names, positions.T):
+        ax.plot(rounds, column, marker="o", markersize=3, color=color, label=name)
+    ax.invert_yaxis()
+    ax.yaxis.set_major_locator(MaxNLocator(integer=True))
+    ax.set_xlabel("Round")
+    ax.set_ylabel("Championship position")
+    ax.set_xticks(rounds)
+    ax.grid(True, alpha=0.3)
+    ax.set_title(title)
+    ax.legend(bbox_to_anchor=(1.02, 1), loc="upper left", fontsize=8)
+    return fig
+
+
+def gap_chart(rounds, names, gap, title):
+    """Points behind the championship leader after each round."""
+    fig, ax = dark_fig(figsize=(10, 4))
+    for color, name, column in zip(line_colors(len(names)), names, gap.T):
+        ax.plot(rounds, column, color=color, label=name)
+    ax.invert_yaxis()
+    ax.set_xlabel("Round")
+    ax.set_ylabel("Points behind leader")
+    ax.set_xticks(rounds)
+    ax.grid(True, alpha=0.3)
+    ax.set_title(title)
+    ax.legend(bbox_to_anchor=(1.02, 1), loc="upper left", fontsize=8)
+    return fig
+
+
+def stint_chart(stints, drivers, colors, title, bar_height=0.8):
+    """
+    Tire stints of several drivers on one chart (one row per driver, first driver on top).
+
+    stints: strategy_utils.tire_stints() rows. Each compound is a single PolyCollection
+    holding the bars of every driver (what broken_barh builds, but across rows).
+    """
+    fig, ax = dark_fig(figsize=(12, max(2, 0.35 * len(drivers) + 1)))
+    row = {driver: i for i, driver in enumerate(drivers)}
+    stints = stints[stints["Driver"].isin(row)]
+    handles = []
+    for compound, group in stints.groupby("Compound", sort=False):
+        left = group["StartLap"].to_numpy(dtype=float) - 1
+        right = left + group["Laps"].to_numpy(dtype=float)
+        bottom = group["Driver"].map(row).to_numpy(dtype=float) - bar_height / 2
+        top = bottom + bar_height
+        verts = np.stack([np.column_stack([left, bottom]), np.column_stack([left, top]),
+                          np.column_stack([right, top]), np.column_stack([right, bottom])], axis=1)
+        color = colors.get(compound, "grey")
+        ax.add_collection(PolyCollection(verts, facecolors=color, edgecolors="black", linewidths=0.5))
+        handles.append(Patch(facecolor=color, edgecolor="black", label=compound.title()))
+
+    ax.set_yticks(range(len(drivers)))
+    ax.set_yticklabels(drivers)
+    ax.set_ylim(len(drivers) - 0.5, -0.5)
+    if not stints.empty:
+        ax.set_xlim(stints["StartLap"].min() - 1, stints["EndLap"].max())
+    ax.set_xlabel("Lap")
+    ax.set_title(title)
+    if handles:
+        ax.legend(handles=handles, bbox_to_anchor=(1.02, 1), loc="upper left", fontsize=8)
+    return fig
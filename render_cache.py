@@ -0,0 +1,105 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+import plot_utils
+import stage_timer
+
+# Memory budget for rendered chart images shared by all pages and users
+RENDER_CACHE_MB = float(os.environ.get("F1_RENDER_CACHE_MB", "256"))
+
+# Resolution used for every cached image (same as st.pyplot's default)
+RENDER_DPI = plot_utils.RENDER_DPI
+
+_lock = threading.Lock()
+_images = OrderedDict()  # key -> image bytes, least recently used first
+_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def _update_hash(h, value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        h.update(repr(list(value.columns) if isinstance(value, pd.DataFrame) else value.name).encode())
+        h.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, np.ndarray):
+        h.update(f"{value.dtype}{value.shape}".encode())
+        h.update(np.ascontiguousarray(value).tobytes() if value.dtype != object else repr(value.tolist()).encode())
+    elif isinstance(value, (list, tuple)):
+        h.update(b"(")
+        for item in value:
+            _update_hash(h, item)
+        h.update(b")")
+    elif isinstance(value, dict):
+        _update_hash(h, sorted(value.items(), key=lambda kv: str(kv[0])))
+    else:
+        h.update(repr(value).encode())
+
+
+def fingerprint(*parts):
+    """Content hash of the data a chart is drawn from (DataFrames, arrays, scalars, nested lists)."""
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        _update_hash(h, part)
+    return h.hexdigest()
+
+
+def figure_bytes(fig, fmt="png", dpi=RENDER_DPI):
+    buf = io.BytesIO()
+    fig.savefig(buf, format=fmt, dpi=dpi, bbox_inches="tight", facecolor=fig.get_facecolor())
+    return buf.getvalue()
+
+
+def render(chart_type, data, params, draw, fmt="png"):
+    """
+    Returns the image bytes of the figure produced by draw(), cached by content.
+
+    chart_type: name of the chart (e.g. "pit_stops")
+    data: whatever the chart is drawn from; fingerprinted, never stored
+    params: everything else that changes the picture (labels, titles, sizes)
+    draw: callable returning a matplotlib Figure; only called on a cache miss
+
+    The figure is closed after rendering so long-running servers don't keep it.
+    """
+    # timed as the render stage; variant "cached" or "drawn" keeps cheap hits apart from real draws
+    with stage_timer.span("render", chart=chart_type, fmt=fmt) as span:
+        key = (chart_type, fingerprint(data), fingerprint(params), plot_utils.THEME_KEY, fmt)
+        with _lock:
+            image = _images.get(key)
+            if image is not None:
+                _images.move_to_end(key)
+                _stats["hits"] += 1
+                span["variant"] = "cached"
+                return image
+            _stats["misses"] += 1
+
+        span["variant"] = "drawn"
+        fig = draw()
+        try:
+            image = figure_bytes(fig, fmt=fmt)
+        finally:
+            plt.close(fig)
+        span["bytes"] = len(image)
+
+    with _lock:
+        _images[key] = image
+        _images.move_to_end(key)
+        budget = RENDER_CACHE_MB * 1024 ** 2
+        total = sum(len(b) for b in _images.values())
+        while total > budget and len(_images) > 1:
+            _, evicted = _images.popitem(last=False)
+            total -= len(evicted)
+            _stats["evictions"] += 1
+    return image
+
+
+def render_stats():
+    with _lock:
+        stats = dict(_stats)
+        stats["images"] = len(_images)
+        stats["size_mb"] = sum(len(b) for b in _images.values()) / 1024 ** 2
+    return stats
@@ -0,0 +1,53 @@
+import json
+import os
+import threading
+import time
+
+import atomic_write
+
+
+def session_key(year, rnd, session_type):
+    """Manifest key of one session, e.g. '2024/05/R'."""
+    return f"{int(year)}/{int(rnd):02d}/{session_type}"
+
+
+class RunManifest:
+    """
+    Checkpoint file of a batch run: which session keys completed and which failed.
+
+    Every update is written straight to disk (temp file + rename), so an interrupted run
+    can be restarted and skip whatever already completed. Only one process should write
+    a given manifest; worker processes report back to it instead.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.completed = {}
+        self.failed = {}
+        if os.path.isfile(path):
+            with open(path) as f:
+                data = json.load(f)
+            self.completed = data.get("completed", {})
+            self.failed = data.get("failed", {})
+
+    def is_completed(self, key):
+        return key in self.completed
+
+    def mark_completed(self, key, info=None):
+        with self._lock:
+            self.completed[key] = dict(info or {}, finished_at=time.strftime("%Y-%m-%dT%H:%M:%S"))
+            self.failed.pop(key, None)
+            self._save()
+
+    def mark_failed(self, key, error):
+        """Records a failure; attempts count up across runs until the key completes."""
+        with self._lock:
+            attempts = self.failed.get(key, {}).get("attempts", 0) + 1
+            self.failed[key] = {"error": str(error), "attempts": attempts,
+                                "failed_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+            self._save()
+
+    def _save(self):
+        with atomic_write.temp_path(self.path) as tmp_path, open(tmp_path, "w") as f:
+            json.dump({"completed": self.completed, "failed": self.failed}, f, indent=1, sort_keys=True)
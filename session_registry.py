@@ -0,0 +1,152 @@
+import os
+import threading
+from collections import OrderedDict
+
+import fastf1
+
+import cache_manager
+import stage_timer
+import warmup_scheduler
+from single_flight import SingleFlight
+
+# Memory budget for loaded sessions kept in this process (shared by every browser tab)
+MEMORY_BUDGET_MB = float(os.environ.get("F1_SESSION_MEMORY_MB", "2048"))
+
+# Data slices a page can ask for. Results are always loaded.
+RESULTS = 'results'
+LAPS = 'laps'
+TELEMETRY = 'telemetry'
+WEATHER = 'weather'
+MESSAGES = 'messages'
+ALL_SLICES = frozenset({RESULTS, LAPS, TELEMETRY, WEATHER, MESSAGES})
+
+# lap telemetry is cut using lap timing, so telemetry needs laps too
+_IMPLIED_SLICES = {TELEMETRY: {LAPS}}
+
+_lock = threading.Lock()
+# (year, event, session_type) -> {"session", "size", "slices"}, oldest first
+_sessions = OrderedDict()
+# one load/upgrade per session key at a time; concurrent callers share it
+_flights = SingleFlight()
+
+
+def session_key(year, event, session_type):
+    return int(year), str(event), str(session_type)
+
+
+def _frame_size(df):
+    if df is None:
+        return 0
+    try:
+        return int(df.memory_usage(index=True, deep=True).sum())
+    except Exception:
+        return 0
+
+
+def estimate_session_size(session):
+    """Approximate resident size of a loaded session in bytes (results, laps, telemetry, weather, messages)."""
+    # read the private attributes so unloaded parts don't raise DataNotLoadedError
+    size = _frame_size(getattr(session, '_results', None))
+    size += _frame_size(getattr(session, '_laps', None))
+    size += _frame_size(getattr(session, '_weather_data', None))
+    size += _frame_size(getattr(session, '_race_control_messages', None))
+    for attr in ('_car_data', '_pos_data'):
+        for telemetry in (getattr(session, attr, None) or {}).values():
+            size += _frame_size(telemetry)
+    return size
+
+
+def _evict_over_budget():
+    # caller holds _lock; the most recently used session is always kept
+    budget = MEMORY_BUDGET_MB * 1024 ** 2
+    total = sum(entry["size"] for entry in _sessions.values())
+    while total > budget and len(_sessions) > 1:
+        key, entry = _sessions.popitem(last=False)
+        total -= entry["size"]
+        print(f"🧹 Dropped session {key} from memory ({entry['size'] / 1024 ** 2:.0f} MB)")
+
+
+def resolve_slices(needs):
+    """Expands a page's declared needs with the slices they depend on."""
+    slices = {RESULTS} | set(needs)
+    unknown = slices - ALL_SLICES
+    if unknown:
+        raise ValueError(f"Unknown session data slices: {sorted(unknown)}")
+    for slice_name in list(slices):
+        slices |= _IMPLIED_SLICES.get(slice_name, set())
+    return frozenset(slices)
+
+
+def _load_kwargs(slices):
+    return {
+        "laps": LAPS in slices,
+        "telemetry": TELEMETRY in slices,
+        "weather": WEATHER in slices,
+        "messages": MESSAGES in slices,
+    }
+
+
+def get_session(year, event, session_type, needs=ALL_SLICES):
+    """
+    Returns a session with at least the requested data slices loaded, shared by
+    every user of this server process.
+
+    needs: iterable of RESULTS, LAPS, TELEMETRY, WEATHER, MESSAGES. Only those
+    slices are loaded; a cached session missing some of them is upgraded in place.
+    Concurrent requests for the same session wait on one load and share it.
+    Least recently used sessions are dropped once MEMORY_BUDGET_MB is exceeded.
+    """
+    key = session_key(year, event, session_type)
+    wanted = resolve_slices(needs)
+    while True:
+        with _lock:
+            entry = _sessions.get(key)
+            if entry is not None:
+                _sessions.move_to_end(key)
+                if wanted <= entry["slices"]:
+                    return entry["session"]
+
+        # user-facing load: background warmup jobs hold off until it's done
+        with warmup_scheduler.interactive():
+            session, slices = _flights.do(key, lambda: _load_into_registry(key, wanted))
+        if wanted <= slices:
+            return session
+        # we waited on a load that fetched fewer slices than we need: upgrade next
+
+
+def _load_into_registry(key, wanted):
+    with _lock:
+        entry = _sessions.get(key)
+    if entry is None:
+        session = fastf1.get_session(*key)
+        loaded = frozenset()
+    else:
+        session, loaded = entry["session"], entry["slices"]
+    if wanted <= loaded:
+        return session, loaded
+
+    # only the missing slices are loaded; FastF1 keeps the parts already on the session
+    missing = wanted - loaded
+    with stage_timer.span("session_load", variant="+".join(sorted(missing)), year=key[0], event=key[1],
+                          session_type=key[2], upgrade=bool(loaded)):
+        session = cache_manager.load_session(session, **_load_kwargs(missing))
+    size = estimate_session_size(session)
+    slices = loaded | wanted
+
+    with _lock:
+        _sessions[key] = {"session": session, "size": size, "slices": slices}
+        _sessions.move_to_end(key)
+        _evict_over_budget()
+    return session, slices
+
+
+def registry_stats():
+    """Sessions currently held in memory (most recently used last) with their approximate size."""
+    with _lock:
+        sessions = [{"key": key, "size_mb": entry["size"] / 1024 ** 2, "slices": sorted(entry["slices"])}
+                    for key, entry in _sessions.items()]
+    return {
+        "sessions": sessions,
+        "total_mb": sum(s["size_mb"] for s in sessions),
+        "budget_mb": MEMORY_BUDGET_MB,
+    }
@@ -0,0 +1,238 @@
+"""
+Stage timings (session loads, telemetry extraction, smoothing, rendering, exports) and
+progress bars driven by them. Finished spans are logged to METRICS_PATH as JSON lines and
+feed a running average per stage, seeded from that file at startup.
+"""
+import atexit
+import contextlib
+import json
+import logging
+import logging.handlers
+import multiprocessing
+import os
+import queue
+import statistics
+import threading
+import time
+from collections import defaultdict, deque
+
+# Structured log of every span (JSON lines); set F1_METRICS_PATH to "" to keep timings in memory only
+METRICS_PATH = os.environ.get("F1_METRICS_PATH", os.path.join("datastore", "metrics", "stages.jsonl"))
+
+# The log is rotated to <path>.1 above this size (by the main process only; pool workers just append)
+METRICS_MAX_MB = float(os.environ.get("F1_METRICS_MAX_MB", "20"))
+
+# Expected durations (s) of stages that never ran yet
+DEFAULT_ESTIMATES_S = {
+    "session_load": 5.0,
+    "telemetry_extraction": 2.0,
+    "smoothing": 0.01,
+    "render": 0.3,
+    "export": 0.5,
+}
+FALLBACK_ESTIMATE_S = 1.0
+
+# Weight of the newest duration in the running average
+EWMA_ALPHA = 0.2
+
+# Recent durations kept per stage for stats() percentiles
+RECENT_SAMPLES = 500
+
+_lock = threading.Lock()
+_local = threading.local()  # per-thread stack of open spans, for parent links
+_estimates = {}  # (stage, variant) and (stage, None) -> running average (s)
+_recent = defaultdict(lambda: deque(maxlen=RECENT_SAMPLES))  # stage -> durations
+_counts = defaultdict(lambda: {"count": 0, "errors": 0, "total_s": 0.0})
+_seeded = False
+_metrics_log = None  # logger feeding the metrics file writer, set up on first use
+
+
+def _update_estimate(key, duration):
+    # caller holds _lock
+    previous = _estimates.get(key)
+    _estimates[key] = duration if previous is None else previous + EWMA_ALPHA * (duration - previous)
+
+
+def _seed_from_log():
+    """Replays the metrics file (and its rotated copy) into the running averages, once per process."""
+    global _seeded
+    with _lock:
+        if _seeded:
+            return
+        _seeded = True
+        for path in (f"{METRICS_PATH}.1", METRICS_PATH) if METRICS_PATH else ():
+            if not os.path.isfile(path):
+                continue
+            try:
+                with open(path) as f:
+                    for line in f:
+                        entry = json.loads(line)
+                        if entry.get("ok", True):
+                            _update_estimate((entry["stage"], entry.get("variant")), entry["duration_s"])
+                            _update_estimate((entry["stage"], None), entry["duration_s"])
+            except (OSError, ValueError, KeyError) as e:
+                # a damaged log only costs the estimates, never the page
+                print(f"⚠️ Could not read stage metrics {path}: {e}")
+
+
+def _metrics_logger():
+    """
+    Logger whose records a QueueListener thread appends to METRICS_PATH. That thread is the
+    only place the file is rotated, so rotations can't race and overwrite <path>.1.
+    """
+    global _metrics_log
+    with _lock:
+        if _metrics_log is None:
+            os.makedirs(os.path.dirname(METRICS_PATH) or ".", exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                METRICS_PATH, maxBytes=max(1, int(METRICS_MAX_MB * 1024 ** 2)), backupCount=1, delay=True)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            records = queue.SimpleQueue()
+            listener = logging.handlers.QueueListener(records, handler)
+            listener.start()
+            atexit.register(listener.stop)  # flushes what's still queued
+            logger = logging.getLogger(f"{__name__}.metrics")
+            logger.propagate = False
+            logger.setLevel(logging.INFO)
+            logger.addHandler(logging.handlers.QueueHandler(records))
+            _metrics_log = logger
+        return _metrics_log
+
+
+def _write(line):
+    if not METRICS_PATH:
+        return
+    try:
+        if multiprocessing.parent_process() is None:
+            _metrics_logger().info(line)
+        else:
+            # pool worker: append only; rotating is left to the main process
+            os.makedirs(os.path.dirname(METRICS_PATH) or ".", exist_ok=True)
+            with open(METRICS_PATH, "a") as f:
+                f.write(line + "\n")
+    except OSError as e:
+        print(f"⚠️ Could not write stage metrics: {e}")
+
+
+def record(stage, duration, variant=None, ok=True, error=None, **attrs):
+    """Adds one measured duration (s) of a stage; span() calls this when it closes."""
+    _seed_from_log()
+    stack = getattr(_local, "stack", [])
+    entry = {
+        "ts": time.strftime("%Y-%m-%dT%H:%M:%S"), "stage": stage, "variant": variant,
+        "duration_s": round(duration, 6), "ok": ok, "error": error,
+        "parent": stack[-1] if stack else None, "thread": threading.current_thread().name,
+        **attrs,
+    }
+    line = json.dumps(entry, default=str)
+    with _lock:
+        counts = _counts[stage]
+        counts["count"] += 1
+        counts["total_s"] += duration
+        if ok:
+            # failed stages end early; they'd drag the estimates down
+            _update_estimate((stage, variant), duration)
+            _update_estimate((stage, None), duration)
+            _recent[stage].append(duration)
+        else:
+            counts["errors"] += 1
+    _write(line)
+
+
+@contextlib.contextmanager
+def span(stage, variant=None, **attrs):
+    """
+    Times the block as one run of `stage` (variant: optional sub-kind with its own estimate,
+    e.g. which session slices were loaded). Exceptions are recorded and re-raised.
+    Yields a dict the block can add attributes to; a "variant" key set there replaces the
+    variant (for blocks that only find out on the way, e.g. cache hit or miss).
+    """
+    stack = _local.__dict__.setdefault("stack", [])
+    extra = {}
+    started = time.perf_counter()
+    error = None
+    stack.append(stage)
+    try:
+        yield extra
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        stack.pop()
+        variant = extra.pop("variant", variant)
+        record(stage, time.perf_counter() - started, variant=variant, ok=error is None, error=error,
+               **{**attrs, **extra})
+
+
+def estimate(stage, variant=None):
+    """Expected duration (s) of a stage: running average of the variant, else of the stage, else a default."""
+    _seed_from_log()
+    with _lock:
+        value = _estimates.get((stage, variant))
+        if value is None:
+            value = _estimates.get((stage, None))
+    if value is None:
+        value = DEFAULT_ESTIMATES_S.get(stage, FALLBACK_ESTIMATE_S)
+    return value
+
+
+def stats():
+    """Per stage: runs, errors, total time and median / p95 of recent successful runs (s)."""
+    with _lock:
+        counts = {stage: dict(c) for stage, c in _counts.items()}
+        recent = {stage: list(d) for stage, d in _recent.items()}
+    summary = {}
+    for stage, c in sorted(counts.items()):
+        durations = sorted(recent.get(stage, []))
+        summary[stage] = dict(c, p50_s=statistics.median(durations) if durations else None,
+                              p95_s=durations[int(0.95 * (len(durations) - 1))] if durations else None)
+    return summary
+
+
+class Progress:
+    """
+    Progress of a multi-stage job, weighted by expected stage durations instead of fixed steps.
+
+    plan: list of (name, units, expected_s): e.g. ("render", 8, 8 * estimate("render"))
+    report: callable pct, status, eta_s -> None
+
+    advance() marks units of a step done; the remaining time is the expected time of what's
+    left, scaled by how far off the expectations were for the work already done. Before
+    anything is done it is the planned time less the time already spent.
+    """
+
+    def __init__(self, plan, report):
+        self.report = report
+        self.steps = {name: (units, expected_s) for name, units, expected_s in plan if units}
+        self.total = sum(expected_s for _, expected_s in self.steps.values()) or 1.0
+        self.done = 0.0
+        self.started = time.perf_counter()
+
+    def _eta(self):
+        elapsed = time.perf_counter() - self.started
+        if self.done <= 0:
+            return max(self.total - elapsed, 0.0)
+        return max(self.total - self.done, 0.0) * elapsed / self.done
+
+    def _report(self, status):
+        self.report(100 * self.done / self.total, status, self._eta())
+
+    def update(self, status):
+        """Reports a new status without progress."""
+        self._report(status)
+
+    def advance(self, name, status, units=1):
+        if name in self.steps:
+            step_units, expected_s = self.steps[name]
+            self.done = min(self.total, self.done + expected_s * units / step_units)
+        self._report(status)
+
+    def finish(self, status):
+        self.done = self.total
+        self.report(100, status, 0.0)
+
+
+def progress_text(pct, eta_s=None):
+    """Percent line under the progress bars, e.g. "**Loaded:** [40/100] - 40% · ~3s left"."""
+    eta = f" · ~{eta_s:.0f}s left" if eta_s and eta_s >= 0.5 else ""
+    return f"**Loaded:** [{pct}/100] - {pct}%{eta}"
@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+
+# Statuses of a classified finisher; anything else counts as a DNF
+FINISHED_STATUS = r'^(?:Finished|Lapped|\+\d+ Laps?)$'
+
+# Columns produced for every driver / constructor
+STANDINGS_METRICS = ['Points', 'Wins', 'Podiums', 'DNFs', 'Rounds', 'PointsPerRound']
+
+
+def finished_mask(status):
+    return status.fillna('').astype(str).str.match(FINISHED_STATUS)
+
+
+def aggregate_standings(results, by='Driver'):
+    """
+    Totals for every driver (by='Driver') or constructor (by='Team') in one grouped pass.
+
+    results: compact results of any number of rounds (standings_store.RESULT_COLUMNS),
+    optionally with a 'Season' column for multi-season frames (then use e.g. by=['Season', 'Driver']).
+    Returns one row per group with STANDINGS_METRICS, sorted by points then wins.
+    """
+    keys = [by] if isinstance(by, str) else list(by)
+    frame = results.dropna(subset=keys)
+    if frame.empty:
+        return pd.DataFrame(columns=keys + STANDINGS_METRICS)
+
+    position = frame['Position']
+    flags = pd.DataFrame({
+        'Points': frame['Points'].astype(float),
+        'Wins': (position == 1).astype(int),
+        'Podiums': (position <= 3).astype(int),
+        'DNFs': (~finished_mask(frame['Status'])).astype(int),
+        'Round': frame['Round'],
+    })
+    flags[keys] = frame[keys]
+
+    grouped = flags.groupby(keys, sort=False)
+    totals = grouped[['Points', 'Wins', 'Podiums', 'DNFs']].sum()
+    totals['Rounds'] = grouped['Round'].nunique()
+    totals['PointsPerRound'] = (totals['Points'] / totals['Rounds']).round(2)
+
+    sort_cols = (['Season'] if 'Season' in keys else []) + ['Points', 'Wins']
+    ascending = [True] * (len(sort_cols) - 2) + [False, False]
+    return totals.reset_index().sort_values(sort_cols, ascending=ascending).reset_index(drop=True)
+
+
+def season_standings(results, as_of_round=None):
+    """Driver and constructor standings (page-ready column names) after a round, default the last."""
+    if as_of_round is not None:
+        results = results[results['Round'] <= as_of_round]
+    driver_standings = aggregate_standings(results, 'Driver')
+    constructor_standings = aggregate_standings(results, 'Team').rename(columns={'Team': 'Constructor'})
+    return driver_standings, constructor_standings
+
+
+def points_matrix(ledger, kind='Driver'):
+    """
+    Points scored per round as a rounds x names NumPy matrix, built from the points ledger.
+    Returns (rounds, names, matrix).
+    """
+    rows = ledger[ledger['Kind'] == kind]
+    rounds = np.sort(rows['Round'].unique()).astype(int)
+    names = np.unique(rows['Name'].astype(str))
+    matrix = np.zeros((len(rounds), len(names)))
+    np.add.at(matrix,
+              (np.searchsorted(rounds, rows['Round'].to_numpy()),
+               np.searchsorted(names, rows['Name'].astype(str).to_numpy())),
+              rows['Points'].to_numpy(dtype=float))
+    return rounds, names, matrix
+
+
+def season_progression(ledger, kind='Driver'):
+    """
+    Round-by-round championship progression for drivers or constructors.
+    Everything is derived from one points matrix, so views are plain array slices:
+    rows are rounds, columns are names.
+
+    Returns a dict with rounds, names, points, cumulative, positions (1 = leader)
+    and gap (points behind the leader after each round).
+    """
+    rounds, names, points = points_matrix(ledger, kind)
+    cumulative = points.cumsum(axis=0)
+
+    # rank by cumulative points; the stable sort keeps ties in name order
+    order = np.argsort(-cumulative, axis=1, kind='stable')
+    positions = np.empty_like(order)
+    positions[np.arange(len(rounds))[:, None], order] = np.arange(1, len(names) + 1)
+
+    gap = cumulative.max(axis=1, keepdims=True) - cumulative if len(names) else cumulative
+    return {
+        'rounds': rounds,
+        'names': names,
+        'points': points,
+        'cumulative': cumulative,
+        'positions': positions,
+        'gap': gap,
+    }
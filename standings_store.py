@@ -0,0 +1,229 @@
+import os
+import threading
+
+import fastf1
+import pandas as pd
+
+import atomic_write
+import cache_manager
+import event_catalog
+import warmup_scheduler
+from standings_engine import STANDINGS_METRICS, season_standings
+
+# Root folder for persisted standings data (Parquet files per season)
+STORE_DIR = os.path.join("datastore", "standings")
+
+# Compact per-round results kept for each season
+RESULT_COLUMNS = ['Round', 'Driver', 'Team', 'Points', 'Position', 'Status']
+
+# Points ledger: one row per (season, round, driver or constructor)
+LEDGER_COLUMNS = ['Season', 'Round', 'Kind', 'Name', 'Points']
+
+
+def season_results_path(year):
+    return os.path.join(STORE_DIR, f"results_{year}.parquet")
+
+
+def points_ledger_path(year):
+    return os.path.join(STORE_DIR, f"ledger_{year}.parquet")
+
+
+def snapshot_path(year, kind):
+    return os.path.join(STORE_DIR, f"standings_{year}_{kind.lower()}.parquet")
+
+
+def _complete_marker_path(year):
+    return os.path.join(STORE_DIR, f"results_{year}.complete")
+
+
+def season_is_complete(year):
+    # a past season can't gain new rounds, so once fully stored it never goes stale
+    return year < pd.Timestamp.now().year
+
+
+def load_race_results(year, rnd):
+    """
+    Loads only the classification of one race (no laps, telemetry, weather or messages)
+    and returns it as a compact frame with RESULT_COLUMNS.
+    """
+    session = fastf1.get_session(year, rnd, 'R')
+    session = cache_manager.load_session(session, laps=False, telemetry=False, weather=False, messages=False)
+    return compact_results(session.results, rnd)
+
+
+def compact_results(results, rnd):
+    compact = pd.DataFrame({
+        'Round': int(rnd),
+        'Driver': results.get('Abbreviation', results.get('Driver')),
+        'Team': results.get('TeamName', results.get('Constructor')),
+        'Points': pd.to_numeric(results.get('Points', 0), errors='coerce'),
+        'Position': pd.to_numeric(results.get('Position'), errors='coerce'),
+        'Status': results.get('Status'),
+    }).reset_index(drop=True)
+    compact['Points'] = compact['Points'].astype(float).fillna(0.0)
+    compact['Position'] = compact['Position'].astype(float)
+    return compact
+
+
+def ledger_rows(year, results):
+    """Turns compact results into driver and constructor ledger rows (points per round)."""
+    drivers = (results.dropna(subset=['Driver'])
+               .groupby(['Round', 'Driver'], as_index=False)['Points'].sum()
+               .rename(columns={'Driver': 'Name'}))
+    drivers['Kind'] = 'Driver'
+    constructors = (results.dropna(subset=['Team'])
+                    .groupby(['Round', 'Team'], as_index=False)['Points'].sum()
+                    .rename(columns={'Team': 'Name'}))
+    constructors['Kind'] = 'Constructor'
+    rows = pd.concat([drivers, constructors], ignore_index=True)
+    rows['Season'] = int(year)
+    return rows[LEDGER_COLUMNS]
+
+
+def _read_or_empty(path, columns):
+    if os.path.isfile(path):
+        return pd.read_parquet(path)
+    return pd.DataFrame(columns=columns)
+
+
+def _append(stored, new_rows):
+    if stored.empty:
+        return new_rows.reset_index(drop=True)
+    return pd.concat([stored, new_rows], ignore_index=True)
+
+
+def _write_parquet(df, path):
+    with atomic_write.temp_path(path) as tmp_path:
+        df.to_parquet(tmp_path, index=False)
+
+
+def _print_error(rnd, err):
+    print(f"⚠️ Could not load round {rnd}: {err}")
+
+
+def pending_rounds(year, last_round):
+    """Rounds of the season that have been raced but are newer than last_round."""
+    schedule = event_catalog.get_schedule(year)
+    raced = schedule[(schedule['RoundNumber'] > last_round) &
+                     (schedule['EventDate'] <= pd.Timestamp.now())]
+    return sorted(int(r) for r in raced['RoundNumber'].unique())
+
+
+_season_locks_guard = threading.Lock()
+_season_locks = {}  # year -> RLock
+
+
+def _season_lock(year):
+    # one update per season at a time: the warmup job and a user's "Load" can hit the same year
+    with _season_locks_guard:
+        return _season_locks.setdefault(int(year), threading.RLock())
+
+
+def update_season(year, on_error=None):
+    """
+    Brings the stored results table and points ledger of a season up to date.
+    Only rounds newer than the last stored round are fetched; new rows are appended.
+    Returns (results, ledger).
+
+    on_error: optional callable rnd, exception -> None
+    """
+    with _season_lock(year):
+        return _update_season(year, on_error)
+
+
+def _update_season(year, on_error):
+    on_error = on_error or _print_error
+    results = _read_or_empty(season_results_path(year), RESULT_COLUMNS)
+    ledger = _read_or_empty(points_ledger_path(year), LEDGER_COLUMNS)
+    if os.path.isfile(_complete_marker_path(year)):
+        return results, ledger
+
+    last_round = int(results['Round'].max()) if not results.empty else 0
+    new_frames = []
+    stopped_early = False
+    for rnd in pending_rounds(year, last_round):
+        try:
+            frame = load_race_results(year, rnd)
+        except Exception as e:
+            on_error(rnd, e)
+            stopped_early = True
+            break
+        if frame.empty:
+            # race happened but results aren't published yet
+            stopped_early = True
+            break
+        new_frames.append(frame)
+    # stopping at the first gap keeps the ledger contiguous, so the next update resumes there
+
+    if new_frames:
+        new_results = pd.concat(new_frames, ignore_index=True)
+        new_ledger = ledger_rows(year, new_results)
+        results = _append(results, new_results)[RESULT_COLUMNS]
+        ledger = _append(ledger, new_ledger)[LEDGER_COLUMNS]
+        _write_parquet(results, season_results_path(year))
+        _write_parquet(ledger, points_ledger_path(year))
+
+    if season_is_complete(year) and not stopped_early and not results.empty:
+        open(_complete_marker_path(year), 'w').close()
+    return results, ledger
+
+
+def _snapshots_fresh(year):
+    # a snapshot is valid until the ledger it was computed from is written again
+    ledger_path = points_ledger_path(year)
+    paths = [snapshot_path(year, kind) for kind in ('Driver', 'Constructor')]
+    if not os.path.isfile(ledger_path) or not all(os.path.isfile(p) for p in paths):
+        return False
+    ledger_mtime = os.path.getmtime(ledger_path)
+    return all(os.path.getmtime(p) >= ledger_mtime for p in paths)
+
+
+def load_snapshots(year):
+    """Persisted end-of-ledger standings for a season, or None when missing or stale."""
+    if not _snapshots_fresh(year):
+        return None
+    snapshots = (pd.read_parquet(snapshot_path(year, 'Driver')),
+                 pd.read_parquet(snapshot_path(year, 'Constructor')))
+    if any(not set(STANDINGS_METRICS) <= set(df.columns) for df in snapshots):
+        return None  # written before the current metrics existed
+    return snapshots
+
+
+def refresh_snapshots(year, on_error=None):
+    """
+    Updates the season results/ledger and returns
+    (driver_standings, constructor_standings, results, ledger).
+    Standings are only recomputed and persisted when the ledger changed.
+    """
+    with _season_lock(year):
+        results, ledger = update_season(year, on_error=on_error)
+        snapshots = load_snapshots(year)
+        if snapshots is None:
+            snapshots = season_standings(results)
+            if not results.empty:
+                _write_parquet(snapshots[0], snapshot_path(year, 'Driver'))
+                _write_parquet(snapshots[1], snapshot_path(year, 'Constructor'))
+    return snapshots[0], snapshots[1], results, ledger
+
+
+_warmup_lock = threading.Lock()
+_warmed_up = set()
+
+
+def warmup_snapshots_once(years):
+    """
+    Queues a snapshot refresh for each season on the shared warmup scheduler,
+    at most once per season for the lifetime of the server process.
+    """
+    with _warmup_lock:
+        pending = [yr for yr in years if yr not in _warmed_up]
+        _warmed_up.update(pending)
+
+    def _warmup(yr):
+        try:
+            refresh_snapshots(yr)
+            print(f"✅ Cached {yr} standings.")
+        except Exception as e:
+            print(f"Warmup error for {yr}: {e}")
+
+    return [warmup_scheduler.submit(_warmup, yr, priority=warmup_scheduler.WARMUP) for yr in pending]
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+
+# Compound colours used by the tire strategy chart
+COMPOUND_COLORS = {
+    'SOFT': '#ff9999',
+    'MEDIUM': '#ffe599',
+    'HARD': '#99ccff',
+    'INTERMEDIATE': '#99e699',
+    'WET': '#3366cc',
+}
+UNKNOWN_COMPOUND = 'UNKNOWN'
+
+STINT_COLUMNS = ['Driver', 'Stint', 'Compound', 'StartLap', 'EndLap', 'Laps']
+
+
+def tire_stints(laps):
+    """
+    Run-length encodes laps into stints: one row per uninterrupted run of laps of a driver
+    on the same compound and stint number (STINT_COLUMNS).
+
+    A new run starts wherever the driver, compound or stint number changes, or a lap is
+    missing, so all boundaries are found with one vectorized comparison against the previous row.
+    """
+    if laps.empty:
+        return pd.DataFrame(columns=STINT_COLUMNS)
+    laps = laps.sort_values(['Driver', 'LapNumber'])
+    driver = laps['Driver'].astype(str).to_numpy()
+    lap = laps['LapNumber'].to_numpy(dtype=float)
+    compound = laps['Compound'].fillna(UNKNOWN_COMPOUND).astype(str).str.upper().to_numpy()
+    stint = laps['Stint'].fillna(-1).to_numpy(dtype=float) if 'Stint' in laps.columns else np.zeros(len(laps))
+
+    change = np.ones(len(laps), dtype=bool)
+    change[1:] = ((driver[1:] != driver[:-1]) | (compound[1:] != compound[:-1])
+                  | (stint[1:] != stint[:-1]) | (lap[1:] != lap[:-1] + 1))
+    starts = np.flatnonzero(change)
+    ends = np.append(starts[1:], len(laps)) - 1
+
+    return pd.DataFrame({
+        'Driver': driver[starts],
+        'Stint': np.where(stint[starts] < 0, np.nan, stint[starts]),
+        'Compound': compound[starts],
+        'StartLap': lap[starts].astype(int),
+        'EndLap': lap[ends].astype(int),
+        'Laps': (ends - starts + 1).astype(int),
+    })
+
+
+def lap_window(laps, lap_range):
+    """Laps with LapNumber inside the inclusive (first, last) range."""
+    first, last = lap_range
+    return laps[(laps['LapNumber'] >= first) & (laps['LapNumber'] <= last)]
+
+
+def pit_stops(laps, driver):
+    """In-laps of one driver (PitInTime set) with PitDuration = PitOutTime - PitInTime in seconds."""
+    pits = laps[(laps['Driver'] == driver) & laps['PitInTime'].notna()].copy()
+    pits['PitDuration'] = (pits['PitOutTime'] - pits['PitInTime']).dt.total_seconds()
+    return pits
+
+
+def top_speeds(laps, results, drivers):
+    """
+    Top speed (km/h) and raw team name of each driver, in the given order.
+    Uses TopSpeed, else SpeedST; the team comes from the laps, else from the results.
+    Drivers without laps get NaN and None.
+    """
+    laps = laps[laps['Driver'].isin(drivers)]
+    column = next((c for c in ('TopSpeed', 'SpeedST') if c in laps.columns), None)
+    speed = laps.groupby('Driver')[column].max() if column else pd.Series(dtype=float)
+
+    team = pd.Series(dtype=object)
+    if 'Team' in laps.columns:
+        team = laps.dropna(subset=['Team']).groupby('Driver')['Team'].first().astype(str).str.strip()
+    if 'Team' in results.columns:
+        result_team = results.dropna(subset=['Abbreviation']).drop_duplicates('Abbreviation')
+        result_team = result_team.set_index('Abbreviation')['Team'].astype(str).str.strip()
+        team = team[team != ''].combine_first(result_team)
+
+    return pd.DataFrame({
+        'Driver': list(drivers),
+        'Top Speed (km/h)': speed.reindex(drivers).to_numpy(dtype=float),
+        'Team': [t if isinstance(t, str) and t else None for t in team.reindex(drivers)],
+    })
+
+
+def sector_times(laps, driver, lap_range, columns=('Sector1', 'Sector2', 'Sector3')):
+    """Sector columns of one driver's laps in lap_range (only the columns the laps have)."""
+    driver_laps = lap_window(laps[laps['Driver'] == driver], lap_range)
+    return driver_laps[[c for c in columns if c in driver_laps.columns]]
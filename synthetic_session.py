@@ -0,0 +1,368 @@
+"""
+Offline stand-ins for FastF1 sessions, for benchmarks and local work without network access.
+
+    import synthetic_session
+    synthetic_session.install(n_drivers=20, sample_hz=4)   # fastf1.get_session / get_event_schedule
+    ...
+    synthetic_session.uninstall()
+
+Sessions are real fastf1.core.Session objects (Laps, Telemetry, SessionResults), so
+pick_driver / pick_fastest / get_telemetry and the app's loaders work on them unchanged.
+Data is generated on load() from a seed derived from (year, round, session), so the
+same session always looks the same. Events are named "Synthetic Grand Prix <n>" so
+nothing derived from them mixes with real data in datastore/.
+"""
+import contextlib
+import zlib
+
+import fastf1
+import fastf1.core
+import fastf1.events
+import numpy as np
+import pandas as pd
+
+# number, abbreviation, first name, last name, team, team colour
+DRIVERS = [
+    ('1', 'VER', 'Max', 'Verstappen', 'Red Bull Racing', '3671C6'),
+    ('11', 'PER', 'Sergio', 'Perez', 'Red Bull Racing', '3671C6'),
+    ('44', 'HAM', 'Lewis', 'Hamilton', 'Mercedes', '27F4D2'),
+    ('63', 'RUS', 'George', 'Russell', 'Mercedes', '27F4D2'),
+    ('16', 'LEC', 'Charles', 'Leclerc', 'Ferrari', 'E8002D'),
+    ('55', 'SAI', 'Carlos', 'Sainz', 'Ferrari', 'E8002D'),
+    ('4', 'NOR', 'Lando', 'Norris', 'McLaren', 'FF8000'),
+    ('81', 'PIA', 'Oscar', 'Piastri', 'McLaren', 'FF8000'),
+    ('14', 'ALO', 'Fernando', 'Alonso', 'Aston Martin', '229971'),
+    ('18', 'STR', 'Lance', 'Stroll', 'Aston Martin', '229971'),
+    ('10', 'GAS', 'Pierre', 'Gasly', 'Alpine', '0093CC'),
+    ('31', 'OCO', 'Esteban', 'Ocon', 'Alpine', '0093CC'),
+    ('23', 'ALB', 'Alexander', 'Albon', 'Williams', '64C4FF'),
+    ('2', 'SAR', 'Logan', 'Sargeant', 'Williams', '64C4FF'),
+    ('22', 'TSU', 'Yuki', 'Tsunoda', 'RB', '6692FF'),
+    ('3', 'RIC', 'Daniel', 'Ricciardo', 'RB', '6692FF'),
+    ('77', 'BOT', 'Valtteri', 'Bottas', 'Kick Sauber', '52E252'),
+    ('24', 'ZHO', 'Guanyu', 'Zhou', 'Kick Sauber', '52E252'),
+    ('20', 'MAG', 'Kevin', 'Magnussen', 'Haas F1 Team', 'B6BABD'),
+    ('27', 'HUL', 'Nico', 'Hulkenberg', 'Haas F1 Team', 'B6BABD'),
+]
+
+POINTS = [25, 18, 15, 12, 10, 8, 6, 4, 2, 1]
+
+# Default laps per session when not given
+DEFAULT_LAPS = {'Race': 57, 'Sprint': 19, 'Qualifying': 12, 'Sprint Qualifying': 8}
+
+# Lap time lost per lap of tyre age (s) and compound pace offset (s)
+TYRE_DEG_S = {'SOFT': 0.09, 'MEDIUM': 0.05, 'HARD': 0.03}
+TYRE_PACE_S = {'SOFT': 0.0, 'MEDIUM': 0.4, 'HARD': 0.8}
+
+PIT_IN_LOSS_S = 3.0
+PIT_OUT_LOSS_S = 18.0
+
+# Fine distance step the speed profile is integrated on (metres)
+PROFILE_STEP_M = 5.0
+
+_installed = {}
+# generated data of memoize=True sessions, by (seed, size parameters)
+_memo = {}
+
+
+def _seed(*parts):
+    return zlib.crc32(repr(parts).encode())
+
+
+def _session_names(rnd):
+    # every fourth round is a sprint weekend
+    if rnd % 4 == 0:
+        return ['Practice 1', 'Sprint Qualifying', 'Sprint', 'Qualifying', 'Race']
+    return ['Practice 1', 'Practice 2', 'Practice 3', 'Qualifying', 'Race']
+
+
+def _event_row(year, rnd):
+    race_day = pd.Timestamp(year=year, month=3, day=3, hour=15) + pd.Timedelta(weeks=rnd - 1)
+    row = {
+        'RoundNumber': rnd,
+        'Country': 'Synthetia',
+        'Location': f'Circuit {rnd}',
+        'OfficialEventName': f'FORMULA 1 SYNTHETIC GRAND PRIX {rnd} {year}',
+        'EventDate': race_day.normalize(),
+        'EventName': f'Synthetic Grand Prix {rnd}',
+        'EventFormat': 'sprint_qualifying' if rnd % 4 == 0 else 'conventional',
+        'F1ApiSupport': True,
+    }
+    for i, name in enumerate(_session_names(rnd), start=1):
+        date_utc = race_day - pd.Timedelta(days=5 - i if i < 5 else 0)
+        row[f'Session{i}'] = name
+        row[f'Session{i}Date'] = date_utc.tz_localize('UTC')
+        row[f'Session{i}DateUtc'] = date_utc
+    return row
+
+
+def synthetic_schedule(year, n_rounds=24, include_testing=False, **kwargs):
+    """Drop-in for fastf1.get_event_schedule."""
+    rows = [_event_row(year, rnd) for rnd in range(1, n_rounds + 1)]
+    return fastf1.events.EventSchedule(pd.DataFrame(rows), year=year)
+
+
+def _round_of(gp):
+    if isinstance(gp, (int, np.integer)):
+        return int(gp)
+    digits = ''.join(ch for ch in str(gp) if ch.isdigit())
+    if not digits:
+        raise ValueError(f"Unknown synthetic event: {gp}")
+    return int(digits)
+
+
+# --- Track model ---
+
+def _track(length_m, rng):
+    """Base speed profile (km/h) and X/Y outline (1/10 m, like FastF1) of a closed circuit."""
+    s = np.arange(0.0, length_m, PROFILE_STEP_M)
+    n_corners = rng.integers(10, 16)
+    centres = np.sort(rng.uniform(0, length_m, n_corners))
+    depth = rng.uniform(60, 220, n_corners)
+    width = rng.uniform(40, 140, n_corners)
+    gap = (s[:, None] - centres[None, :] + length_m / 2) % length_m - length_m / 2
+    bumps = np.exp(-0.5 * (gap / width) ** 2)
+    speed = np.clip(330 - (bumps * depth).sum(axis=1), 70, None)
+
+    # heading turns at the corners (slower corner = sharper turn), summing to one full loop
+    turn = bumps * depth * rng.choice([-0.3, 1.0], n_corners, p=[0.3, 0.7])
+    heading = np.cumsum(turn.sum(axis=1))
+    heading = heading / heading[-1] * 2 * np.pi
+    x = np.cumsum(np.cos(heading)) * PROFILE_STEP_M
+    y = np.cumsum(np.sin(heading)) * PROFILE_STEP_M
+    # remove the closing error so the lap ends where it started
+    ramp = np.linspace(0, 1, len(s))
+    x, y = x - ramp * x[-1], y - ramp * y[-1]
+    return s, speed, x * 10, y * 10
+
+
+def _strategy(n_laps, rng, race):
+    """Compound and stint of every lap, plus the laps that end in the pit lane."""
+    if not race:
+        return np.full(n_laps, 'SOFT'), np.ones(n_laps), np.array([], dtype=int)
+    n_stops = int(rng.integers(1, 3)) if n_laps > 15 else 0
+    stops = np.sort(rng.choice(np.arange(8, n_laps - 5), n_stops, replace=False)) if n_stops else np.array([], dtype=int)
+    compounds = [rng.choice(['SOFT', 'MEDIUM'])]
+    for _ in range(n_stops):
+        compounds.append(rng.choice([c for c in ('MEDIUM', 'HARD') if c != compounds[-1]] or ['HARD']))
+    stint = np.searchsorted(stops, np.arange(1, n_laps + 1), side='left') + 1
+    return np.array(compounds)[stint - 1], stint.astype(float), stops
+
+
+class SyntheticSession(fastf1.core.Session):
+    """A fastf1 Session whose load() generates data instead of calling the API."""
+
+    def __init__(self, event, session_name, n_drivers=20, n_laps=None, sample_hz=4.0,
+                 track_length_m=5000.0, seed=0, memoize=False):
+        super().__init__(event, session_name, f1_api_support=True)
+        self.n_drivers = n_drivers
+        self.n_laps = n_laps or DEFAULT_LAPS.get(session_name, 12)
+        self.sample_hz = sample_hz
+        self.track_length_m = track_length_m
+        self.seed = _seed(event.year, int(event['RoundNumber']), session_name, seed)
+        # memoize: generate once per process and share the frames between session objects,
+        # so repeated loads cost what the app's own code costs (used by the benchmarks)
+        self.memoize = memoize
+        self._generated = None
+
+    def _data(self):
+        if not self.memoize:
+            return self._generate()
+        key = (self.seed, self.n_drivers, self.n_laps, self.sample_hz, self.track_length_m)
+        if key not in _memo:
+            _memo[key] = self._generate()
+        data = _memo[key]
+        # same frames, bound to this session
+        return dict(data, laps=fastf1.core.Laps(data['laps'], session=self), **{
+            attr: {number: fastf1.core.Telemetry(frame, session=self, driver=number) for number, frame in data[attr].items()}
+            for attr in ('car_data', 'pos_data')})
+
+    def load(self, *, laps=True, telemetry=True, weather=True, messages=True, livedata=None):
+        data = self._generated = self._generated or self._data()
+        self._session_info = {'Meeting': {'Name': self.event['EventName']}}
+        self._t0_date = data['t0_date']
+        self._session_start_time = pd.Timedelta(0)
+        self._total_laps = self.n_laps if self.name in self._RACE_LIKE_SESSIONS else None
+        self._results = data['results']
+        self._session_status = pd.DataFrame({'Time': [pd.Timedelta(0)], 'Status': ['Started']})
+        self._track_status = pd.DataFrame({'Time': [pd.Timedelta(0)], 'Status': ['1'], 'Message': ['AllClear']})
+        if laps or telemetry:
+            self._laps = data['laps']
+        if telemetry:
+            self._car_data = data['car_data']
+            self._pos_data = data['pos_data']
+        if weather:
+            self._weather_data = data['weather']
+        if messages:
+            self._race_control_messages = pd.DataFrame(columns=['Time', 'Category', 'Message', 'Status', 'Flag'])
+
+    # --- generation ---
+
+    def _generate(self):
+        rng = np.random.default_rng(self.seed)
+        race = self.name in ('Race', 'Sprint')
+        s, base_speed, track_x, track_y = _track(self.track_length_m, np.random.default_rng(self.seed % 97))
+        base_lap = np.sum(PROFILE_STEP_M / (base_speed / 3.6))
+        accel = np.gradient(base_speed)
+        t0_date = self.date - pd.Timedelta(hours=1)
+        start_s = 3600.0
+
+        drivers = [DRIVERS[i] if i < len(DRIVERS) else
+                   (str(100 + i), f'D{i:02d}', 'Driver', f'{i}', 'Synthetic', '888888')
+                   for i in range(self.n_drivers)]
+        pace = 1 + rng.normal(0, 0.006, self.n_drivers).clip(-0.015, 0.02)
+
+        lap_rows, traces, car_data, pos_data = [], {}, {}, {}
+        for (number, abbr, _, _, team, _), driver_pace in zip(drivers, pace):
+            compound, stint, stops = _strategy(self.n_laps, rng, race)
+            lap_no = np.arange(1, self.n_laps + 1)
+            tyre_life = lap_no - np.concatenate([[0], stops])[stint.astype(int) - 1]
+            lap_time = (base_lap * driver_pace
+                        + np.vectorize(TYRE_PACE_S.get)(compound) + np.vectorize(TYRE_DEG_S.get)(compound) * tyre_life
+                        - (0.06 * lap_no if race else 0.0)
+                        + rng.normal(0, 0.25, self.n_laps))
+            pit_in = np.isin(lap_no, stops)
+            pit_out = np.isin(lap_no, stops + 1)
+            lap_time += PIT_IN_LOSS_S * pit_in + PIT_OUT_LOSS_S * pit_out
+            if not race:
+                # qualifying: alternating push laps and slow cool-down laps
+                lap_time[1::2] *= 1.25
+
+            # time at every profile point of every lap, speeds scaled to the lap time
+            scale = base_lap / lap_time
+            point_dt = (PROFILE_STEP_M / (base_speed / 3.6))[None, :] / scale[:, None]
+            lap_start = start_s + np.concatenate([[0], np.cumsum(lap_time)[:-1]])
+            point_t = lap_start[:, None] + np.cumsum(point_dt, axis=1) - point_dt[:, :1]
+            point_v = base_speed[None, :] * scale[:, None]
+
+            sector_idx = [len(s) // 3, 2 * len(s) // 3]
+            s1 = point_t[:, sector_idx[0]] - lap_start
+            s2 = point_t[:, sector_idx[1]] - lap_start - s1
+            lap_end = lap_start + lap_time
+            lap_rows.append(pd.DataFrame({
+                'Time': pd.to_timedelta(lap_end, unit='s'),
+                'Driver': abbr, 'DriverNumber': number,
+                'LapTime': pd.to_timedelta(lap_time, unit='s'),
+                'LapNumber': lap_no.astype(float), 'Stint': stint,
+                'PitOutTime': pd.to_timedelta(np.where(pit_out, lap_start + 2.0, np.nan), unit='s'),
+                'PitInTime': pd.to_timedelta(np.where(pit_in, lap_end - 1.0, np.nan), unit='s'),
+                'Sector1Time': pd.to_timedelta(s1, unit='s'),
+                'Sector2Time': pd.to_timedelta(s2, unit='s'),
+                'Sector3Time': pd.to_timedelta(lap_time - s1 - s2, unit='s'),
+                'Sector1SessionTime': pd.to_timedelta(lap_start + s1, unit='s'),
+                'Sector2SessionTime': pd.to_timedelta(lap_start + s1 + s2, unit='s'),
+                'Sector3SessionTime': pd.to_timedelta(lap_end, unit='s'),
+                'SpeedI1': point_v[:, sector_idx[0]], 'SpeedI2': point_v[:, sector_idx[1]],
+                'SpeedFL': point_v[:, -1], 'SpeedST': point_v.max(axis=1),
+                'IsPersonalBest': False,
+                'Compound': compound, 'TyreLife': tyre_life.astype(float), 'FreshTyre': True,
+                'Team': team,
+                'LapStartTime': pd.to_timedelta(lap_start, unit='s'),
+                'LapStartDate': t0_date + pd.to_timedelta(lap_start, unit='s'),
+                'TrackStatus': '1', 'Position': np.nan, 'Deleted': False, 'DeletedReason': '',
+                'FastF1Generated': False, 'IsAccurate': ~(pit_in | pit_out) & (lap_no > 1),
+            }))
+
+            traces[number] = (point_t.ravel(), point_v.ravel(),
+                              (np.arange(self.n_laps)[:, None] * self.track_length_m + s[None, :]).ravel())
+
+        # resample every trace at the telemetry rate; like the live feed, all cars share one
+        # time base (position data slightly offset from car data)
+        session_end = max(trace[0][-1] for trace in traces.values()) + 1.0
+        for target, offset in ((car_data, 0.0), (pos_data, 0.5)):
+            t = np.arange(start_s - 1.0 + offset / self.sample_hz, session_end, 1 / self.sample_hz)
+            t = t + rng.normal(0, 0.01, len(t))
+            times = {'Date': t0_date + pd.to_timedelta(t, unit='s'),
+                     'SessionTime': pd.to_timedelta(t, unit='s'),
+                     'Time': pd.to_timedelta(t - t[0], unit='s')}
+            for number, (flat_t, flat_v, flat_s) in traces.items():
+                dist = np.interp(t, flat_t, flat_s) % self.track_length_m
+                if target is car_data:
+                    # parked after the flag
+                    speed = np.where(t > flat_t[-1], 0.0, np.interp(t, flat_t, flat_v))
+                    point = (dist / PROFILE_STEP_M).astype(int) % len(s)
+                    frame = dict(times, **{
+                        'RPM': 7000 + (speed % 40) / 40 * 5000, 'Speed': speed,
+                        'nGear': np.clip(speed // 40 + 1, 1, 8).astype(int),
+                        'Throttle': np.where(accel[point] >= 0, 100.0, 0.0),
+                        'Brake': accel[point] < -0.5,
+                        'DRS': np.where(base_speed[point] > 315, 12, 0), 'Source': 'car',
+                    })
+                else:
+                    frame = dict(times, **{'Status': 'OnTrack', 'X': np.interp(dist, s, track_x),
+                                           'Y': np.interp(dist, s, track_y), 'Z': 0.0, 'Source': 'pos'})
+                target[number] = fastf1.core.Telemetry(pd.DataFrame(frame), session=self, driver=number)
+
+        laps = pd.concat(lap_rows, ignore_index=True)
+        # running order at the end of every lap
+        laps['Position'] = laps.groupby('LapNumber')['Time'].rank(method='first')
+        best = laps.groupby('Driver')['LapTime'].transform('min')
+        laps['IsPersonalBest'] = laps['LapTime'] == best
+        laps = fastf1.core.Laps(laps, session=self)
+
+        return {'t0_date': t0_date, 'laps': laps, 'car_data': car_data, 'pos_data': pos_data,
+                'results': self._results_frame(drivers, laps, race, rng),
+                'weather': self._weather(laps, rng)}
+
+    def _results_frame(self, drivers, laps, race, rng):
+        if race:
+            finish = laps[laps['LapNumber'] == self.n_laps].set_index('DriverNumber')['Time']
+        else:
+            finish = laps.groupby('DriverNumber')['LapTime'].min()
+        order = finish.sort_values()
+        results = pd.DataFrame([{
+            'DriverNumber': number, 'BroadcastName': f'{first[0]} {last.upper()}', 'Abbreviation': abbr,
+            'DriverId': last.lower(), 'TeamName': team, 'TeamColor': color, 'TeamId': team.lower().replace(' ', '_'),
+            'FirstName': first, 'LastName': last, 'FullName': f'{first} {last}', 'HeadshotUrl': '',
+            'CountryCode': '', 'Status': 'Finished', 'Laps': float(self.n_laps),
+        } for number, abbr, first, last, team, color in drivers]).set_index('DriverNumber', drop=False)
+        results['Position'] = order.rank(method='first').reindex(results.index).astype(float)
+        results['ClassifiedPosition'] = results['Position'].astype(int).astype(str)
+        results['GridPosition'] = rng.permutation(len(results)) + 1.0
+        results['Points'] = [float(POINTS[int(p) - 1]) if race and p <= len(POINTS) else 0.0
+                             for p in results['Position']]
+        results['Time'] = (finish - order.iloc[0]).reindex(results.index) if race else pd.NaT
+        for q in ('Q1', 'Q2', 'Q3'):
+            results[q] = pd.NaT if race else finish.reindex(results.index)
+        results = results.sort_values('Position')
+        return fastf1.core.SessionResults(results.reset_index(drop=True), _force_default_cols=True)
+
+    def _weather(self, laps, rng):
+        minutes = np.arange(0, laps['Time'].max().total_seconds() + 60, 60)
+        return pd.DataFrame({
+            'Time': pd.to_timedelta(minutes, unit='s'),
+            'AirTemp': 24 + rng.normal(0, 0.3, len(minutes)).cumsum() * 0.1,
+            'Humidity': 45.0, 'Pressure': 1012.0, 'Rainfall': False,
+            'TrackTemp': 38 + rng.normal(0, 0.3, len(minutes)).cumsum() * 0.1,
+            'WindDirection': 180, 'WindSpeed': 1.5,
+        })
+
+
+def get_session(year, gp, identifier=None, **params):
+    """Drop-in for fastf1.get_session; params go to SyntheticSession (n_drivers, n_laps, sample_hz, ...)."""
+    event = fastf1.events.Event(_event_row(int(year), _round_of(gp)), year=int(year))
+    return SyntheticSession(event, event.get_session_name(identifier), **params)
+
+
+def install(n_rounds=24, **params):
+    """Makes fastf1.get_session / fastf1.get_event_schedule return synthetic data (params as get_session)."""
+    _installed.setdefault('get_session', fastf1.get_session)
+    _installed.setdefault('get_event_schedule', fastf1.get_event_schedule)
+    fastf1.get_session = lambda year, gp, identifier=None, **kw: get_session(year, gp, identifier, **params)
+    fastf1.get_event_schedule = lambda year, **kw: synthetic_schedule(year, n_rounds)
+
+
+def uninstall():
+    """Restores the real FastF1 functions."""
+    for name, original in _installed.items():
+        setattr(fastf1, name, original)
+    _installed.clear()
+
+
+@contextlib.contextmanager
+def installed(n_rounds=24, **params):
+    install(n_rounds, **params)
+    try:
+        yield
+    finally:
+        uninstall()
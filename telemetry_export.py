@@ -0,0 +1,87 @@
+import gzip
+import io
+import tempfile
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import stage_timer
+
+# Download formats: label -> (file extension, MIME type)
+FORMATS = {
+    'Parquet': ('.parquet', 'application/vnd.apache.parquet'),
+    'Arrow IPC': ('.arrow', 'application/vnd.apache.arrow.file'),
+    'CSV (gzip)': ('.csv.gz', 'application/gzip'),
+}
+
+# Rows serialized at a time; also the Parquet row group / Arrow record batch size
+CHUNK_ROWS = 50_000
+
+# Exports up to this size stay in memory, bigger ones spill to a temp file
+SPOOL_MAX_BYTES = 32 * 1024 ** 2
+
+
+def iter_chunks(frames, rows=CHUNK_ROWS):
+    """Yields DataFrame chunks of at most `rows` rows from a DataFrame or an iterable of DataFrames (e.g. one per lap)."""
+    if isinstance(frames, pd.DataFrame):
+        frames = [frames]
+    for frame in frames:
+        for start in range(0, len(frame), rows):
+            yield frame.iloc[start:start + rows]
+
+
+def write_export(frames, fmt, sink):
+    """
+    Serializes `frames` to the binary file object `sink` in format `fmt` (a FORMATS key),
+    one chunk at a time, so the whole export never exists as one in-memory string.
+    The schema of the first chunk is used for the rest.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if fmt == 'CSV (gzip)':
+        with gzip.GzipFile(fileobj=sink, mode='wb') as zipped:
+            with io.TextIOWrapper(zipped, encoding='utf-8', newline='') as text:
+                for i, chunk in enumerate(iter_chunks(frames)):
+                    chunk.to_csv(text, index=False, header=(i == 0))
+        return
+
+    writer = schema = None
+    try:
+        for chunk in iter_chunks(frames):
+            table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+            if writer is None:
+                schema = table.schema
+                writer = (pq.ParquetWriter(sink, schema) if fmt == 'Parquet'
+                          else pa.ipc.new_file(sink, schema))
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def export_file(frames, fmt):
+    """Export as a (spooled) temp file, rewound and ready to read."""
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    write_export(frames, fmt, spool)
+    spool.seek(0)
+    return spool
+
+
+def export_bytes(frames, fmt):
+    """
+    Export as bytes, for st.download_button (which reads whatever it is given into
+    memory anyway). The spooled temp file is always closed.
+    """
+    with stage_timer.span("export", variant=fmt) as span, export_file(frames, fmt) as spool:
+        data = spool.read()
+        span["bytes"] = len(data)
+    return data
+
+
+def file_name(stem, fmt):
+    return f"{stem}{FORMATS[fmt][0]}"
+
+
+def mime_type(fmt):
+    return FORMATS[fmt][1]
@@ -0,0 +1,115 @@
+import json
+import os
+
+import pandas as pd
+import pyarrow as pa
+
+import atomic_write
+import session_registry
+import stage_timer
+
+# Root folder of the on-disk telemetry store.
+# Layout: datastore/telemetry/<year>/<event>/<session>/<driver>_<lap>.arrow
+STORE_DIR = os.path.join("datastore", "telemetry")
+
+# Lap fields saved next to the telemetry so a store hit doesn't need the session
+LAP_FIELDS = ['LapNumber', 'LapTime', 'Sector1Time', 'Sector2Time', 'Sector3Time', 'Compound']
+_LAP_META_KEY = b'f1_lap'
+
+# Session slices needed to cut a lap out of the car data
+TELEMETRY_NEEDS = {session_registry.LAPS, session_registry.TELEMETRY}
+
+
+def _slug(value):
+    return str(value).strip().replace(' ', '_').replace('/', '-')
+
+
+def telemetry_path(year, event, session_type, driver, lap='fastest'):
+    """Path of the Arrow IPC file for one (year, event, session, driver, lap)."""
+    return os.path.join(STORE_DIR, str(year), _slug(event), _slug(session_type),
+                        f"{_slug(driver)}_{_slug(lap)}.arrow")
+
+
+def _encode_lap_value(value):
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if isinstance(value, pd.Timedelta):
+        return {'td': value.total_seconds()}
+    if hasattr(value, 'item'):
+        # numpy scalar -> plain python value
+        return value.item()
+    return value
+
+
+def _decode_lap_value(value):
+    if isinstance(value, dict) and 'td' in value:
+        return pd.Timedelta(seconds=value['td'])
+    return value
+
+
+def save_telemetry(telemetry, lap, year, event, session_type, driver, lap_key='fastest'):
+    """
+    Writes one lap of telemetry to the store.
+    The file is written to a temp name first so readers never see a partial file.
+    """
+    path = telemetry_path(year, event, session_type, driver, lap_key)
+
+    table = pa.Table.from_pandas(pd.DataFrame(telemetry), preserve_index=False)
+    lap_meta = {field: _encode_lap_value(lap.get(field)) for field in LAP_FIELDS}
+    metadata = dict(table.schema.metadata or {})
+    metadata[_LAP_META_KEY] = json.dumps(lap_meta).encode()
+    table = table.replace_schema_metadata(metadata)
+
+    with atomic_write.temp_path(path) as tmp_path:
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    return path
+
+
+def load_telemetry(year, event, session_type, driver, lap='fastest'):
+    """
+    Reads one lap of telemetry back from the store (memory-mapped).
+    Returns (lap, telemetry) or None when the lap isn't stored yet.
+    """
+    path = telemetry_path(year, event, session_type, driver, lap)
+    if not os.path.isfile(path):
+        return None
+    try:
+        with pa.memory_map(path, 'r') as source:
+            table = pa.ipc.open_file(source).read_all()
+    except (OSError, pa.ArrowInvalid):
+        # corrupt / truncated file: treat as a miss so it gets rewritten
+        return None
+
+    lap_meta = json.loads((table.schema.metadata or {}).get(_LAP_META_KEY, b'{}'))
+    lap_info = pd.Series({k: _decode_lap_value(v) for k, v in lap_meta.items()}, dtype=object)
+    return lap_info, table.to_pandas()
+
+
+def fastest_lap_telemetry(year, event, session_type, driver):
+    """
+    (lap, telemetry) of a driver's fastest lap: read from the store, else cut from the
+    shared session (upgraded in place with laps + telemetry) and stored for next time.
+    Timed as the telemetry_extraction stage, variant "store" or "session".
+    """
+    with stage_timer.span("telemetry_extraction", year=year, event=event, session_type=session_type,
+                          driver=driver) as span:
+        span["variant"] = "store"
+        stored = load_telemetry(year, event, session_type, driver)
+        if stored is not None:
+            return stored
+        span["variant"] = "session"
+        try:
+            session = session_registry.get_session(year, event, session_type, needs=TELEMETRY_NEEDS)
+            lap = session.laps.pick_driver(driver).pick_fastest()
+            telemetry = lap.get_telemetry()
+        except Exception as e:
+            raise RuntimeError(f"No telemetry for {driver}: {e}")
+        try:
+            save_telemetry(telemetry, lap, year, event, session_type, driver)
+        except Exception as e:
+            # the store is only a speed-up, a failed write shouldn't break the page
+            print(f"⚠️ Could not store telemetry for {driver}: {e}")
+        span["rows"] = len(telemetry)
+        return lap, telemetry
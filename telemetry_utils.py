@@ -0,0 +1,190 @@
+import functools
+
+import numpy as np
+from matplotlib.figure import Figure
+
+# Pixels per inch of the on-screen chart (matplotlib's layout resolution); charts are
+# rasterized at plot_utils.RENDER_DPI for sharpness, but shown at this size
+PLOT_DPI = 100
+
+
+@functools.lru_cache(maxsize=None)
+def axes_width_px(figsize, dpi=PLOT_DPI):
+    """Pixel width of the plotting area of a single-axes figure of `figsize` (default margins)."""
+    return Figure(figsize=figsize, dpi=dpi).add_subplot().bbox.width
+
+
+def target_points(figsize, dpi=PLOT_DPI):
+    """Point budget for a line plot: one min/max pair per two pixel columns of the axes."""
+    return max(int(axes_width_px(tuple(figsize), dpi)), 50)
+
+
+def minmax_indices(distance, values, n_out):
+    """
+    Shape-preserving decimation keyed on distance.
+
+    The distance range is split into n_out // 2 equal buckets and, for every channel in
+    `values` (1-D or 2-D, samples in rows), the index of the minimum and maximum sample in
+    each bucket is kept, so braking points and speed peaks survive. First and last samples
+    are always kept. Returns sorted row indices into the original arrays.
+    """
+    distance = np.asarray(distance, dtype=float)
+    n = len(distance)
+    if n <= n_out or n_out < 4:
+        return np.arange(n)
+
+    values = np.asarray(values, dtype=float)
+    if values.ndim == 1:
+        values = values[:, None]
+
+    n_buckets = n_out // 2
+    edges = np.linspace(np.nanmin(distance), np.nanmax(distance), n_buckets + 1)
+    starts = np.unique(np.searchsorted(distance, edges[:-1], side='left'))
+    starts = starts[starts < n]
+    bucket = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, n)))
+
+    keep = [np.array([0, n - 1])]
+    for channel in values.T:
+        for reduce in (np.fmin, np.fmax):
+            extreme = reduce.reduceat(channel, starts)
+            hit = np.flatnonzero(channel == extreme[bucket])
+            # first matching sample per bucket
+            _, first = np.unique(bucket[hit], return_index=True)
+            keep.append(hit[first])
+    return np.unique(np.concatenate(keep))
+
+
+def downsample(telemetry, columns, figsize, distance_col='Distance'):
+    """
+    Rows of `telemetry` needed to draw `columns` against distance on a figure of `figsize`.
+    Non-numeric or missing columns are ignored; returns the frame unchanged when it's small enough.
+    """
+    n_out = target_points(figsize)
+    if len(telemetry) <= n_out or distance_col not in telemetry.columns:
+        return telemetry
+    cols = [c for c in columns if c in telemetry.columns]
+    numeric = telemetry[cols].select_dtypes(include=['number', 'bool'])
+    if numeric.empty:
+        return telemetry
+    idx = minmax_indices(telemetry[distance_col].to_numpy(), numeric.to_numpy(dtype=float), n_out)
+    return telemetry.iloc[idx]
+
+
+# --- Smoothing ---
+# Channels that are measurements and can be averaged; everything else (Date, Time, gear, DRS,
+# DriverAhead, ...) is passed through untouched
+CONTINUOUS_CHANNELS = ('Speed', 'Throttle', 'RPM')
+
+# Default width of the smoothing window along the lap (metres)
+SMOOTHING_WINDOW_M = 50.0
+
+
+def smooth_channels(telemetry, window_m=SMOOTHING_WINDOW_M, channels=CONTINUOUS_CHANNELS, distance_col='Distance'):
+    """
+    Moving average of the continuous channels over a window of `window_m` metres centred on each sample.
+
+    The box filter is computed for all channels at once from cumulative sums, with the window
+    edges found by searchsorted on distance, so uneven sample spacing doesn't change its width.
+    NaN samples are left out of the average. Returns a copy; other columns are unchanged.
+    """
+    cols = [c for c in channels if c in telemetry.columns]
+    if not cols or distance_col not in telemetry.columns or len(telemetry) < 2:
+        return telemetry
+    distance = telemetry[distance_col].to_numpy(dtype=float)
+    values = telemetry[cols].to_numpy(dtype=float)
+
+    lo = np.searchsorted(distance, distance - window_m / 2, side='left')
+    hi = np.searchsorted(distance, distance + window_m / 2, side='right')
+    valid = ~np.isnan(values)
+    sums = np.vstack([np.zeros(len(cols)), np.cumsum(np.where(valid, values, 0.0), axis=0)])
+    counts = np.vstack([np.zeros(len(cols)), np.cumsum(valid, axis=0)])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        smoothed = (sums[hi] - sums[lo]) / (counts[hi] - counts[lo])
+
+    result = telemetry.copy()
+    result[cols] = smoothed
+    return result
+
+
+# --- Distance-aligned laps ---
+# Spacing of the shared distance grid laps are aligned on (metres)
+GRID_STEP_M = 5.0
+
+# Channels that hold states rather than measurements; aligned by taking the last sample, not interpolating
+DISCRETE_CHANNELS = ('nGear', 'Gear', 'DRS', 'Brake')
+
+
+def _seconds(values):
+    if np.issubdtype(values.dtype, np.timedelta64):
+        return values / np.timedelta64(1, 's')
+    return np.asarray(values, dtype=float)
+
+
+def resample_laps(distances, channels, grid):
+    """
+    Resamples many laps onto one distance grid in a single pass.
+
+    distances: per-lap 1-D distance arrays (increasing)
+    channels: {name: per-lap 1-D value arrays}; DISCRETE_CHANNELS keep their last value
+    grid: distances to sample at; points outside a lap's own distance range are NaN
+
+    All laps are concatenated with their distances offset so they don't overlap, which lets a
+    single np.interp call find every lap's (fractional) sample position at every grid point.
+    Returns {name: laps x grid float array}.
+    """
+    if len(grid) == 0:
+        # laps without a common distance range: nothing to sample
+        return {name: np.empty((len(distances), 0)) for name in channels}
+    lengths = np.array([len(d) for d in distances])
+    first = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    lo_d = np.array([d[0] for d in distances])
+    hi_d = np.array([d[-1] for d in distances])
+    span = max(hi_d.max(), grid[-1]) - min(lo_d.min(), grid[0]) + 1.0
+    offsets = np.arange(len(distances)) * span
+    positions = np.interp(
+        (grid[None, :] + offsets[:, None]).ravel(),
+        np.concatenate([d + off for d, off in zip(distances, offsets)]),
+        np.arange(lengths.sum(), dtype=float),
+    ).reshape(len(distances), len(grid))
+    outside = (grid[None, :] < lo_d[:, None]) | (grid[None, :] > hi_d[:, None])
+    # keep the indices inside each lap even where the grid runs past it
+    positions = np.clip(positions, first[:, None], (first + lengths - 1)[:, None])
+
+    lo = np.floor(positions).astype(int)
+    hi = np.minimum(lo + 1, (first + lengths - 1)[:, None])
+    frac = positions - lo
+
+    resampled = {}
+    for name, per_lap in channels.items():
+        values = np.concatenate([_seconds(np.asarray(v)) for v in per_lap])
+        if name in DISCRETE_CHANNELS:
+            out = values[lo]
+        else:
+            out = values[lo] * (1 - frac) + values[hi] * frac
+        out[outside] = np.nan
+        resampled[name] = out
+    return resampled
+
+
+def align_laps(telemetries, channels=('Speed',), step=GRID_STEP_M, reference=0, distance_col='Distance'):
+    """
+    Aligns any number of laps on one shared distance grid (the distance all of them cover).
+
+    telemetries: per-lap telemetry frames (e.g. from Lap.get_telemetry()) with Distance and Time
+    channels: columns to align; discrete ones (DISCRETE_CHANNELS) keep their last value
+    reference: index of the lap deltas are measured against
+
+    Returns a dict with 'grid' (metres), 'Time' (seconds since lap start), 'Delta'
+    (cumulative time lost to the reference lap, positive = slower) and one array per channel;
+    all arrays are laps x grid.
+    """
+    distances = [_seconds(t[distance_col].to_numpy()) for t in telemetries]
+    grid = np.arange(max(d[0] for d in distances), min(d[-1] for d in distances), step)
+    names = ['Time'] + [c for c in channels if c != 'Time']
+    aligned = resample_laps(distances, {
+        name: [t[name].to_numpy() if name in t.columns else np.full(len(t), np.nan) for t in telemetries]
+        for name in names
+    }, grid)
+    aligned['grid'] = grid
+    aligned['Delta'] = aligned['Time'] - aligned['Time'][reference]
+    return aligned
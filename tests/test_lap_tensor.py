@@ -0,0 +1,33 @@
+import fastf1
+import numpy as np
+import pytest
+
+import lap_tensor
+import synthetic_session
+
+
+@pytest.fixture
+def stored(tmp_path, monkeypatch):
+    monkeypatch.setattr(lap_tensor, "STORE_DIR", str(tmp_path))
+    with synthetic_session.installed(n_drivers=4, n_laps=8):
+        session = fastf1.get_session(2024, 1, 'R')
+        session.load()
+        yield session, lap_tensor.build_tensor(session, 2024, 'Synthetic', 'R')
+
+
+def test_aligned_laps_delta_matches_lap_times(stored):
+    session, data = stored
+    fastest = {drv: session.laps.pick_drivers(drv).pick_fastest() for drv in data['drivers']}
+    aligned = lap_tensor.aligned_laps(data, [(drv, lap['LapNumber']) for drv, lap in fastest.items()])
+
+    lap_times = np.array([lap['LapTime'].total_seconds() for lap in fastest.values()])
+    assert aligned['grid'][0] == 0.0
+    np.testing.assert_allclose(aligned['Time'][:, 0], 0.0, atol=1e-6)
+    np.testing.assert_allclose(aligned['Delta'][:, -1], lap_times - lap_times[0], atol=0.05)
+    assert aligned['Speed'].shape == aligned['Time'].shape
+
+
+def test_aligned_laps_misses_unknown_laps(stored):
+    _, data = stored
+    assert lap_tensor.aligned_laps(data, [('???', 1)]) is None
+    assert lap_tensor.aligned_laps(data, [(data['drivers'][0], 99)]) is None
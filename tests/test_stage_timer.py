@@ -0,0 +1,37 @@
+import pytest
+
+import stage_timer
+
+
+@pytest.fixture(autouse=True)
+def in_memory_metrics(monkeypatch):
+    monkeypatch.setattr(stage_timer, "METRICS_PATH", "")
+    monkeypatch.setattr(stage_timer, "_seeded", True)
+    monkeypatch.setattr(stage_timer, "_estimates", {})
+
+
+def test_single_step_progress_shows_time_left_from_the_running_average():
+    for duration in (4.0, 6.0):
+        stage_timer.record("session_load", duration, variant="results")
+    expected_s = stage_timer.estimate("session_load", "results")
+    assert expected_s == pytest.approx(4.4)
+
+    reports = []
+    progress = stage_timer.Progress([("session", 1, expected_s)], lambda *report: reports.append(report))
+    progress.update("Loading session results...")
+    pct, _, eta_s = reports[-1]
+    assert eta_s == pytest.approx(expected_s, abs=0.5)
+    assert stage_timer.progress_text(int(pct), eta_s) == "**Loaded:** [0/100] - 0% · ~4s left"
+
+    progress.finish("Session loaded")
+    pct, _, eta_s = reports[-1]
+    assert stage_timer.progress_text(int(pct), eta_s) == "**Loaded:** [100/100] - 100%"
+
+
+def test_eta_scales_with_the_pace_of_finished_work():
+    reports = []
+    progress = stage_timer.Progress([("a", 2, 10.0)], lambda *report: reports.append(report))
+    progress.started -= 10.0  # the first half took twice as long as planned
+    progress.advance("a", "half")
+    assert reports[-1][0] == pytest.approx(50)
+    assert reports[-1][2] == pytest.approx(10.0, rel=0.05)
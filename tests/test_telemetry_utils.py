@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import telemetry_utils
+
+
+def fastest_lap(samples=800, length_m=5300.0):
+    """Telemetry shaped like a real fastest lap: a few hundred samples, braking dips every corner."""
+    rng = np.random.default_rng(0)
+    distance = np.sort(rng.uniform(0, length_m, samples))
+    speed = 250 + 80 * np.sin(distance / 300) + rng.normal(0, 2, samples)
+    return pd.DataFrame({'Distance': distance, 'Speed': speed})
+
+
+@pytest.mark.parametrize('figsize', [(6, 3), (10, 4)])
+def test_downsample_draws_fewer_points_than_a_real_lap(figsize):
+    lap = fastest_lap()
+    plot = telemetry_utils.downsample(lap, ['Speed'], figsize)
+    assert len(plot) < len(lap)
+    assert len(plot) <= telemetry_utils.target_points(figsize)
+
+
+def test_downsample_keeps_extremes_and_ends():
+    lap = fastest_lap()
+    plot = telemetry_utils.downsample(lap, ['Speed'], (6, 3))
+    assert plot['Speed'].max() == lap['Speed'].max()
+    assert plot['Speed'].min() == lap['Speed'].min()
+    assert plot.index[0] == lap.index[0] and plot.index[-1] == lap.index[-1]
+
+
+def test_target_points_follows_axes_width():
+    assert telemetry_utils.target_points((6, 3)) < telemetry_utils.target_points((10, 4))
+    assert telemetry_utils.target_points((10, 4)) == int(telemetry_utils.axes_width_px((10, 4)))
@@ -0,0 +1,99 @@
+"""
+Pre-warms the FastF1 cache before the app takes traffic.
+
+    python warmup_cache.py --seasons 2023-2024 --sessions R Q --retries 3
+
+Completed and failed (year, round, session) keys are checkpointed in a manifest
+(default datastore/warmup_manifest.json); a restarted run skips completed keys.
+Failed keys are retried with exponential backoff. Loads go through
+fastf1_utils.preload_keys, so the worker count is F1_WARMUP_WORKERS.
+"""
+import argparse
+import os
+import time
+
+import event_catalog
+import fastf1_utils
+from export_seasons import parse_numbers, plan_jobs
+from run_manifest import RunManifest, session_key
+
+MANIFEST_PATH = os.path.join("datastore", "warmup_manifest.json")
+
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m{seconds:02d}s" if hours else f"{minutes}m{seconds:02d}s"
+
+
+def progress_reporter(total, started=None):
+    """progress_callback for preload_keys printing throughput (sessions/min) and an ETA."""
+    started = started or time.monotonic()
+
+    def report(completed, _total):
+        elapsed = max(time.monotonic() - started, 1e-6)
+        per_second = completed / elapsed
+        eta = (total - completed) / per_second if per_second else float("inf")
+        print(f"⏱️ {completed}/{total} sessions · {per_second * 60:.1f} sessions/min · "
+              f"ETA {format_duration(eta) if eta != float('inf') else '?'}")
+    return report
+
+
+def is_warm(manifest, key, full=False):
+    done = manifest.completed.get(session_key(*key))
+    # a results-only warmup doesn't count as done for a --full run
+    return done is not None and (done.get("full", False) or not full)
+
+
+def warmup(keys, manifest, retries=3, backoff_s=30.0, full=False):
+    """
+    Loads every key not yet completed in the manifest; failed keys are retried up to
+    `retries` more times, waiting backoff_s, 2 * backoff_s, ... between rounds.
+    Returns the keys that still failed.
+    """
+    pending = [key for key in keys if not is_warm(manifest, key, full)]
+    print(f"🔥 {len(pending)} sessions to warm ({len(keys) - len(pending)} already cached)")
+
+    for attempt in range(1, retries + 2):
+        if not pending:
+            break
+        if attempt > 1:
+            delay = backoff_s * 2 ** (attempt - 2)
+            print(f"🔁 Retrying {len(pending)} failed sessions in {delay:.0f}s (attempt {attempt})")
+            time.sleep(delay)
+
+        def record(key, error, attempt=attempt):
+            if error is None:
+                manifest.mark_completed(session_key(*key), {"attempts": attempt, "full": full})
+            else:
+                manifest.mark_failed(session_key(*key), error)
+
+        pending = fastf1_utils.preload_keys(pending, progress_callback=progress_reporter(len(pending)),
+                                            result_callback=record, full=full)
+    return pending
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-warm the FastF1 cache, resumably.")
+    parser.add_argument("--seasons", required=True, help="e.g. 2024 or 2022-2024")
+    parser.add_argument("--rounds", help="e.g. 1-5,8 (default: every past round)")
+    parser.add_argument("--sessions", nargs="+", default=["R"], choices=list(event_catalog.SESSION_CODES),
+                        help="session codes (default: R)")
+    parser.add_argument("--full", action="store_true", help="cache laps and telemetry too, not just results")
+    parser.add_argument("--retries", type=int, default=3, help="retry rounds for failed sessions (default: 3)")
+    parser.add_argument("--backoff", type=float, default=30.0, help="first retry delay in seconds, doubled each round")
+    parser.add_argument("--manifest", default=MANIFEST_PATH, help=f"checkpoint file (default: {MANIFEST_PATH})")
+    args = parser.parse_args(argv)
+
+    jobs = plan_jobs(parse_numbers(args.seasons), set(parse_numbers(args.rounds)) if args.rounds else None,
+                     args.sessions)
+    started = time.monotonic()
+    failed = warmup([(year, rnd, st) for year, rnd, _, st in jobs], RunManifest(args.manifest),
+                    retries=args.retries, backoff_s=args.backoff, full=args.full)
+    print(f"🏁 Warmup finished in {format_duration(time.monotonic() - started)}"
+          f" ({len(failed)} sessions still failing)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,125 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+# Priority classes, lower runs first
+INTERACTIVE = 0
+PREFETCH = 1
+WARMUP = 2
+PRIORITY_NAMES = {INTERACTIVE: "interactive", PREFETCH: "prefetch", WARMUP: "warmup"}
+
+# Background worker threads shared by every warmup / prefetch in the process
+MAX_WORKERS = int(os.environ.get("F1_WARMUP_WORKERS", "6"))
+
+
+class WarmupScheduler:
+    """
+    Priority job queue for background session loading.
+
+    Jobs run on a small pool of daemon threads, highest priority first. While any
+    interactive request is in progress (see interactive()), workers don't start
+    new prefetch/warmup jobs, so users never queue behind the cache warmup.
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS):
+        self.max_workers = max_workers
+        self._cond = threading.Condition()
+        self._queue = []  # heap of (priority, seq, enqueued_at, fn, args, kwargs, future)
+        self._seq = itertools.count()
+        self._interactive = 0
+        self._workers = []
+        self._metrics = {name: {"submitted": 0, "completed": 0, "failed": 0,
+                                "total_wait_s": 0.0, "max_wait_s": 0.0}
+                         for name in PRIORITY_NAMES.values()}
+        self._interactive_metrics = {"requests": 0, "total_s": 0.0, "max_s": 0.0}
+
+    def submit(self, fn, *args, priority=WARMUP, **kwargs):
+        """Queues fn(*args, **kwargs) and returns a concurrent.futures.Future."""
+        future = Future()
+        with self._cond:
+            self._start_workers()
+            heapq.heappush(self._queue, (priority, next(self._seq), time.monotonic(),
+                                         fn, args, kwargs, future))
+            self._metrics[PRIORITY_NAMES[priority]]["submitted"] += 1
+            self._cond.notify()
+        return future
+
+    @contextmanager
+    def interactive(self):
+        """Marks a user-facing request; background jobs pause until it finishes."""
+        with self._cond:
+            self._interactive += 1
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            with self._cond:
+                self._interactive -= 1
+                m = self._interactive_metrics
+                m["requests"] += 1
+                m["total_s"] += elapsed
+                m["max_s"] = max(m["max_s"], elapsed)
+                self._cond.notify_all()
+
+    def _start_workers(self):
+        # caller holds _cond
+        while len(self._workers) < self.max_workers:
+            worker = threading.Thread(target=self._work, daemon=True,
+                                      name=f"warmup-{len(self._workers)}")
+            self._workers.append(worker)
+            worker.start()
+
+    def _next_job(self):
+        with self._cond:
+            while True:
+                if self._queue:
+                    priority = self._queue[0][0]
+                    if priority == INTERACTIVE or not self._interactive:
+                        return heapq.heappop(self._queue)
+                self._cond.wait()
+
+    def _work(self):
+        while True:
+            priority, _, enqueued_at, fn, args, kwargs, future = self._next_job()
+            if not future.set_running_or_notify_cancel():
+                continue
+            wait = time.monotonic() - enqueued_at
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as e:
+                future.set_exception(e)
+                outcome = "failed"
+            else:
+                future.set_result(result)
+                outcome = "completed"
+            with self._cond:
+                m = self._metrics[PRIORITY_NAMES[priority]]
+                m[outcome] += 1
+                m["total_wait_s"] += wait
+                m["max_wait_s"] = max(m["max_wait_s"], wait)
+
+    def stats(self):
+        """Queue depth and wait-time metrics per priority class."""
+        with self._cond:
+            depth = {name: 0 for name in PRIORITY_NAMES.values()}
+            for item in self._queue:
+                depth[PRIORITY_NAMES[item[0]]] += 1
+            classes = {}
+            for name, m in self._metrics.items():
+                started = m["completed"] + m["failed"]
+                classes[name] = dict(m, queued=depth[name],
+                                     avg_wait_s=m["total_wait_s"] / started if started else 0.0)
+            interactive = dict(self._interactive_metrics, active=self._interactive)
+        return {"classes": classes, "interactive": interactive, "workers": len(self._workers)}
+
+
+# Process-wide scheduler used by fastf1_utils, main.py and the pages
+scheduler = WarmupScheduler()
+submit = scheduler.submit
+interactive = scheduler.interactive
+stats = scheduler.stats